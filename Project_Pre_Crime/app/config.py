@@ -30,5 +30,13 @@ class Settings:
     
     # Feature Engineering
     CURRENT_YEAR: int = int(os.getenv("CURRENT_YEAR", "2026"))
+    
+    # Caching
+    STATS_CACHE_TTL_SECONDS: float = float(os.getenv("STATS_CACHE_TTL_SECONDS", "30"))
+    
+    # Prediction Write Queue
+    PREDICTION_WRITE_BATCH_SIZE: int = int(os.getenv("PREDICTION_WRITE_BATCH_SIZE", "32"))
+    PREDICTION_WRITE_INTERVAL_SECONDS: float = float(os.getenv("PREDICTION_WRITE_INTERVAL_SECONDS", "0.05"))
+    PREDICTION_WRITE_QUEUE_SIZE: int = int(os.getenv("PREDICTION_WRITE_QUEUE_SIZE", "10000"))
 
 settings = Settings()
@@ -6,7 +6,7 @@ import os
 import logging
 import torch
 import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, List
 from pathlib import Path
 
 # Importar modelos desde el directorio src
@@ -21,10 +21,15 @@ except ImportError:
     PoliceDiscriminator = None
 
 from app.config import settings
+from app.core.features import build_model_inputs
 from app.models.schemas import CitizenFeatureVector
 
 logger = logging.getLogger("PreCogSystem")
 
+# Dimensión de entrada de los modelos: 3 features escalares + 13 de trabajo
+FEATURE_DIM = 16
+JOB_FEATURES = 13
+
 class PrecogSystem:
     """
     Sistema de inferencia neuronal.
@@ -102,7 +107,7 @@ class PrecogSystem:
             return self._fallback_prediction(citizen)
         
         try:
-            with torch.no_grad():
+            with torch.inference_mode():
                 # Construir tensor de entrada
                 # En producción real, aquí cargaríamos el subgrafo desde Neo4j
                 features = self._build_feature_tensor(citizen)
@@ -114,7 +119,7 @@ class PrecogSystem:
                 edge_index = torch.tensor([[0], [0]], dtype=torch.long, device=self.device)
                 
                 # Inferencia
-                prediction = self.discriminator(features, edge_index)
+                prediction = torch.sigmoid(self.discriminator(features, edge_index))
                 probability = prediction.item()
                 
                 # Calcular confianza (basada en distancia del umbral)
@@ -129,26 +134,75 @@ class PrecogSystem:
         except Exception as e:
             logger.error(f"❌ Error en inferencia: {e}")
             return self._fallback_prediction(citizen)
-    
-    def _build_feature_tensor(self, citizen: CitizenFeatureVector) -> torch.Tensor:
-        """Construye tensor de entrada desde CitizenFeatureVector."""
-        features = [
-            citizen.risk_seed,
-            citizen.criminal_degree / 10.0,  # Normalizar
-            citizen.age_normalized or 0.35,
-        ]
+
+    def predict_many(self, citizens: List[CitizenFeatureVector]) -> List[Dict[str, Any]]:
+        """
+        Ejecuta inferencia para un lote de ciudadanos en una sola pasada.
+        Cada ciudadano es un nodo aislado (solo auto-bucle), igual que en predict.
+        
+        Args:
+            citizens: Vectores de características
+            
+        Returns:
+            Lista de diccionarios con probability, confidence y method (mismo orden)
+        """
+        if not citizens:
+            return []
+        
+        if not self.models_loaded or self.discriminator is None:
+            return [self._fallback_prediction(citizen) for citizen in citizens]
         
-        # Añadir job_vector si existe
-        if citizen.job_vector:
-            features.extend(citizen.job_vector[:13])  # Max 13 jobs
-        else:
-            features.extend([0.0] * 13)
+        try:
+            with torch.inference_mode():
+                features = torch.from_numpy(self.build_feature_matrix(citizens)).to(self.device)
+                
+                # Un auto-bucle por nodo: sin mensajes entre ciudadanos
+                nodes = torch.arange(len(citizens), dtype=torch.long, device=self.device)
+                edge_index = torch.stack([nodes, nodes])
+                
+                probabilities = torch.sigmoid(self.discriminator(features, edge_index)).view(-1).cpu().numpy()
+                confidences = np.abs(probabilities - 0.5) * 2
+                
+                return [
+                    {
+                        "probability": probability,
+                        "confidence": confidence,
+                        "method": "neural_network"
+                    }
+                    for probability, confidence in zip(probabilities.tolist(), confidences.tolist())
+                ]
+                
+        except Exception as e:
+            logger.error("❌ Error en inferencia por lotes: %s", e)
+            return [self._fallback_prediction(citizen) for citizen in citizens]
+
+    @staticmethod
+    def build_feature_matrix(citizens: List[CitizenFeatureVector]) -> np.ndarray:
+        """
+        Matriz de entrada [N, FEATURE_DIM] float32 de un lote:
+        [risk_seed, criminal_degree/10, age_normalized, job_vector (13), padding].
+        Las filas se rellenan en un kernel Numba (app.core.features).
+        """
+        n = len(citizens)
+        risk_seed = np.fromiter((c.risk_seed for c in citizens), dtype=np.float64, count=n)
+        criminal_degree = np.fromiter((c.criminal_degree for c in citizens), dtype=np.float64, count=n)
+        age = np.fromiter(
+            (np.nan if c.age_normalized is None else c.age_normalized for c in citizens),
+            dtype=np.float64,
+            count=n
+        )
         
-        # Padding hasta 16 features
-        while len(features) < 16:
-            features.append(0.0)
+        # job_vector ya es un ndarray: copia por filas, sin pasar por listas
+        job_matrix = np.zeros((n, JOB_FEATURES), dtype=np.float32)
+        for i, citizen in enumerate(citizens):
+            job_vector = citizen.job_vector[:JOB_FEATURES]
+            job_matrix[i, :job_vector.shape[0]] = job_vector
         
-        return torch.tensor([features], dtype=torch.float32, device=self.device)
+        return build_model_inputs(risk_seed, criminal_degree, age, job_matrix, FEATURE_DIM)
+    
+    def _build_feature_tensor(self, citizen: CitizenFeatureVector) -> torch.Tensor:
+        """Construye tensor de entrada desde CitizenFeatureVector."""
+        return torch.from_numpy(self.build_feature_matrix([citizen])).to(self.device)
     
     def _fallback_prediction(self, citizen: CitizenFeatureVector) -> Dict[str, Any]:
         """Predicción de respaldo usando heurística simple."""
@@ -0,0 +1,94 @@
+"""
+Caché en memoria con expiración (TTL) para agregados de solo lectura.
+Pensada para los endpoints de estadísticas que los dashboards consultan
+periódicamente: dentro de la ventana TTL la respuesta sale de memoria.
+"""
+import asyncio
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+from app.config import settings
+
+
+def _current_task_cancelling() -> bool:
+    """True si la tarea actual tiene una cancelación pendiente."""
+    task = asyncio.current_task()
+    return task is not None and task.cancelling() > 0
+
+
+class TTLCache:
+    """
+    Caché clave → (expiración, valor) para funciones asíncronas.
+    
+    - La clave es la función más sus argumentos
+    - Llamadas concurrentes con la misma clave comparten una única consulta
+    - clear() invalida todo; lo que estuviera en vuelo no se guarda
+    - Si la consulta compartida se cancela, los que esperaban la relanzan
+    - El valor se comparte entre llamadas sin copiarlo: las funciones
+      cacheadas devuelven valores inmutables (tuplas, MappingProxyType,
+      modelos frozen); quien necesite modificarlo lo copia en su lado
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._generation = 0
+
+    def clear(self):
+        """Invalida todas las entradas (llamar tras cualquier escritura)."""
+        self._entries.clear()
+        self._inflight.clear()
+        self._generation += 1
+
+    def cached(self, func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        """Decorador: cachea el resultado de la corrutina durante ttl segundos."""
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+            
+            while True:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    return entry[1]
+                
+                inflight = self._inflight.get(key)
+                if inflight is None:
+                    break
+                try:
+                    return await asyncio.shield(inflight)
+                except asyncio.CancelledError:
+                    # Si se canceló la consulta compartida (no este llamador),
+                    # se reintenta: otro llamador pasa a lanzarla
+                    if inflight.cancelled() and not _current_task_cancelling():
+                        continue
+                    raise
+            
+            generation = self._generation
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            try:
+                value = await func(*args, **kwargs)
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()  # Marcar como recuperada si nadie más espera
+                raise
+            except BaseException:
+                # Cancelación: no se comparte como resultado, los que esperan reintentan
+                future.cancel()
+                raise
+            finally:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            
+            future.set_result(value)
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+            return value
+
+        return wrapper
+
+
+# Caché compartida de estadísticas (se vacía en cada escritura)
+stats_cache = TTLCache(ttl=settings.STATS_CACHE_TTL_SECONDS)
@@ -0,0 +1,45 @@
+"""
+Contratos entre las proyecciones Cypher de los repositorios y los esquemas Pydantic.
+
+Los servicios construyen los modelos de lectura con model_construct (sin
+revalidar), así que cada proyección debe devolver todos los campos
+obligatorios del modelo. Estas comprobaciones se ejecutan al importar el
+servicio: una proyección incompleta falla al arrancar, no en producción.
+"""
+import re
+from typing import Set, Type
+
+from pydantic import BaseModel
+
+# Claves de un mapa Cypher: "clave:" al inicio de línea o tras "{" / ","
+_PROJECTION_KEY = re.compile(r"(?:^|[{,])\s*(\w+)\s*:", re.MULTILINE)
+
+
+def projection_keys(projection: str) -> Set[str]:
+    """Devuelve las claves que expone un mapa de proyección Cypher."""
+    return set(_PROJECTION_KEY.findall(projection))
+
+
+def required_fields(model: Type[BaseModel]) -> Set[str]:
+    """Devuelve los campos obligatorios de un modelo Pydantic."""
+    return {name for name, field in model.model_fields.items() if field.is_required()}
+
+
+def assert_projection_covers(model: Type[BaseModel], projection: str, source: str) -> None:
+    """
+    Verifica que una proyección cubra los campos obligatorios del modelo.
+
+    Args:
+        model: Modelo que se construirá sin validación
+        projection: Texto Cypher con el mapa RETURN {...}
+        source: Nombre de la query, para el mensaje de error
+
+    Raises:
+        RuntimeError: Si faltan campos obligatorios en la proyección
+    """
+    missing = required_fields(model) - projection_keys(projection)
+    if missing:
+        raise RuntimeError(
+            f"La proyección {source} no cubre los campos obligatorios de "
+            f"{model.__name__}: {', '.join(sorted(missing))}"
+        )
@@ -9,6 +9,17 @@ from app.config import settings
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("PreCrimeDB")
 
+# Esquema mínimo que la API necesita (idempotente gracias a IF NOT EXISTS).
+# El índice de rango sobre risk_seed convierte el filtro de /high-risk
+# en un NodeIndexSeekByRange en lugar de un NodeByLabelScan.
+SCHEMA_STATEMENTS = [
+    "CREATE CONSTRAINT citizen_id IF NOT EXISTS FOR (c:Citizen) REQUIRE c.id IS UNIQUE",
+    "CREATE RANGE INDEX citizen_risk_seed IF NOT EXISTS FOR (c:Citizen) ON (c.risk_seed)",
+    # Índices ordenados para el ETag de los dashboards (última predicción/resolución)
+    "CREATE RANGE INDEX prediction_timestamp IF NOT EXISTS FOR ()-[p:RED_BALL_PREDICTED]-() ON (p.timestamp)",
+    "CREATE RANGE INDEX prediction_resolved_at IF NOT EXISTS FOR ()-[p:RED_BALL_PREDICTED]-() ON (p.resolved_at)",
+]
+
 class Neo4jManager:
     """Gestor singleton de conexión a Neo4j."""
     
@@ -48,6 +59,22 @@ class Neo4jManager:
                 return False
         return False
 
+    async def ensure_schema(self):
+        """
+        Aplica constraints e índices requeridos por la API (migración al arrancar).
+        Los fallos se registran pero no impiden el arranque.
+        """
+        if self._driver is None:
+            raise ConnectionError("El driver de Neo4j no está inicializado.")
+
+        async with self._driver.session() as session:
+            for statement in SCHEMA_STATEMENTS:
+                try:
+                    result = await session.run(statement)
+                    await result.consume()
+                except Exception as e:
+                    logger.warning(f"⚠️ No se pudo aplicar esquema '{statement}': {e}")
+
     async def query(self, cypher_query: str, parameters: dict = None):
         """
         Ejecuta una consulta Cypher y devuelve resultados como lista de diccionarios.
@@ -68,6 +95,26 @@ class Neo4jManager:
             records = await result.data()
             return records
 
+    async def stream(self, cypher_query: str, parameters: dict = None):
+        """
+        Ejecuta una consulta Cypher y produce cada registro según llega,
+        sin materializar el resultado completo en memoria.
+        
+        Args:
+            cypher_query: Consulta Cypher a ejecutar
+            parameters: Parámetros de la consulta
+            
+        Yields:
+            Un diccionario por registro
+        """
+        if self._driver is None:
+            raise ConnectionError("El driver de Neo4j no está inicializado. Llama a connect() primero.")
+
+        async with self._driver.session() as session:
+            result = await session.run(cypher_query, parameters or {})
+            async for record in result:
+                yield record.data()
+
     async def execute_write(self, cypher_query: str, parameters: dict = None):
         """
         Ejecuta una transacción de escritura (CREATE, MERGE, SET, DELETE).
@@ -0,0 +1,140 @@
+"""
+Construcción de características para inferencia por lotes.
+Transforma perfiles de ciudadanos (dicts de Neo4j) en arrays NumPy.
+
+El kernel numérico se compila con Numba si está instalado;
+si no, la misma función se ejecuta como Python normal.
+"""
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # Fallback: decorador sin efecto, el kernel corre en el intérprete
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Categorías de trabajo para el one-hot (el orden define la posición)
+JOB_CATEGORIES = (
+    "Doctor", "Engineer", "Teacher", "Police", "Artist",
+    "Driver", "Clerk", "Manager", "Scientist", "Other"
+)
+JOB_INDEX = {job: idx for idx, job in enumerate(JOB_CATEGORIES)}
+OTHER_JOB_INDEX = JOB_INDEX["Other"]
+NO_JOB_INDEX = -1
+
+# Tablas one-hot precalculadas: la codificación es una búsqueda, no un bucle.
+# La última fila (todo ceros) corresponde a NO_JOB_INDEX (-1).
+# Tabla de solo lectura: cada fila es una vista compartida entre peticiones.
+JOB_ONE_HOT = np.vstack([
+    np.eye(len(JOB_CATEGORIES), dtype=np.float32),
+    np.zeros((1, len(JOB_CATEGORIES)), dtype=np.float32)
+])
+JOB_ONE_HOT.flags.writeable = False
+JOB_VECTORS = {job: JOB_ONE_HOT[idx] for job, idx in JOB_INDEX.items()}
+NO_JOB_VECTOR = JOB_ONE_HOT[NO_JOB_INDEX]
+
+
+def job_to_index(job: Optional[str]) -> int:
+    """Mapea un trabajo a su posición one-hot (-1 si no tiene trabajo)."""
+    if not job:
+        return NO_JOB_INDEX
+    return JOB_INDEX.get(job, OTHER_JOB_INDEX)
+
+
+def encode_job(job: Optional[str]) -> np.ndarray:
+    """One-hot de solo lectura de un trabajo ("Other" si es desconocido, ceros si no tiene)."""
+    if not job:
+        return NO_JOB_VECTOR
+    return JOB_VECTORS.get(job, JOB_VECTORS["Other"])
+
+
+# Sin parallel=True: los lotes de la API son pequeños (<= 100 filas) y el
+# pool de hilos de Numba bloquea el cierre del proceso si el kernel se
+# invoca desde un hilo que no es el principal.
+@njit(cache=True)
+def _normalize_ages(born, current_year):
+    """Kernel: edad normalizada [0, 1] (0 si no hay año de nacimiento)."""
+    n = born.shape[0]
+    age = np.empty(n, np.float64)
+    for i in range(n):
+        if born[i] > 0:
+            age[i] = min(max((current_year - born[i]) / 100.0, 0.0), 1.0)
+        else:
+            age[i] = 0.0
+    return age
+
+
+def build_feature_arrays(
+    citizens: List[Dict[str, Any]],
+    current_year: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Construye las características numéricas de un lote de ciudadanos.
+    
+    Args:
+        citizens: Perfiles devueltos por CitizenRepository
+        current_year: Año de referencia para la edad
+        
+    Returns:
+        (age_normalized [N], job_matrix [N, len(JOB_CATEGORIES)])
+    """
+    # born puede venir como string desde el generador de ciudad
+    born = np.array([int(c.get("born") or 0) for c in citizens], dtype=np.int64)
+    job_idx = np.array([job_to_index(c.get("job")) for c in citizens], dtype=np.int64)
+    # Indexado sobre la tabla precalculada: -1 selecciona la fila de ceros
+    return _normalize_ages(born, current_year), JOB_ONE_HOT[job_idx]
+
+
+@njit(cache=True)
+def _fill_model_inputs(risk_seed, criminal_degree, age, job_mat, default_age, out):
+    """Kernel: filas de entrada del modelo [risk, degree/10, age, one-hot..., padding]."""
+    n = out.shape[0]
+    n_jobs = min(job_mat.shape[1], out.shape[1] - 3)
+    for i in range(n):
+        out[i, 0] = risk_seed[i]
+        out[i, 1] = criminal_degree[i] / 10.0
+        # Edad 0 o desconocida (NaN) → edad por defecto
+        out[i, 2] = age[i] if age[i] > 0 else default_age
+        for j in range(n_jobs):
+            out[i, 3 + j] = job_mat[i, j]
+    return out
+
+
+def build_model_inputs(
+    risk_seed: np.ndarray,
+    criminal_degree: np.ndarray,
+    age: np.ndarray,
+    job_matrix: np.ndarray,
+    n_features: int,
+    default_age: float = 0.35
+) -> np.ndarray:
+    """
+    Construye la matriz de entrada del modelo para un lote.
+    
+    Args:
+        risk_seed: [N] riesgo base
+        criminal_degree: [N] grado criminal (se normaliza /10)
+        age: [N] edad normalizada (NaN si se desconoce)
+        job_matrix: [N, n_jobs] one-hot de trabajo
+        n_features: Ancho de la entrada del modelo (se rellena con ceros)
+        default_age: Edad usada cuando falta
+        
+    Returns:
+        Matriz float32 [N, n_features]
+    """
+    out = np.zeros((risk_seed.shape[0], n_features), dtype=np.float32)
+    return _fill_model_inputs(
+        np.ascontiguousarray(risk_seed, dtype=np.float64),
+        np.ascontiguousarray(criminal_degree, dtype=np.float64),
+        np.ascontiguousarray(age, dtype=np.float64),
+        np.ascontiguousarray(job_matrix, dtype=np.float32),
+        default_age,
+        out
+    )
@@ -0,0 +1,56 @@
+"""
+Generación de IDs para entidades creadas por la API (crímenes, ubicaciones).
+
+IDs estilo Snowflake de 64 bits, sin leer /dev/urandom en cada alta:
+  milisegundos desde EPOCH (42 bits) | worker (10 bits) | secuencia (12 bits)
+El timestamp evita colisiones entre reinicios y el worker (PID) entre
+procesos; la secuencia cubre hasta 4096 IDs por milisegundo y proceso.
+"""
+import os
+import threading
+import time
+
+# 2026-01-01T00:00:00Z en milisegundos
+EPOCH_MS = 1_767_225_600_000
+
+_WORKER_BITS = 10
+_SEQUENCE_BITS = 12
+_SEQUENCE_MASK = (1 << _SEQUENCE_BITS) - 1
+
+
+class SnowflakeGenerator:
+    """Generador monótono de IDs de 64 bits por proceso."""
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id & ((1 << _WORKER_BITS) - 1)
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        """Devuelve el siguiente ID (espera al próximo milisegundo si se agota la secuencia)."""
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000 - EPOCH_MS
+            if now_ms <= self._last_ms:
+                # Mismo milisegundo (o reloj atrasado): avanzar la secuencia
+                now_ms = self._last_ms
+                self._sequence = (self._sequence + 1) & _SEQUENCE_MASK
+                if self._sequence == 0:
+                    now_ms += 1
+            else:
+                self._sequence = 0
+            self._last_ms = now_ms
+            
+            return (
+                (now_ms << (_WORKER_BITS + _SEQUENCE_BITS))
+                | (self.worker_id << _SEQUENCE_BITS)
+                | self._sequence
+            )
+
+
+_generator = SnowflakeGenerator(worker_id=os.getpid())
+
+
+def new_id(prefix: str) -> str:
+    """ID de entidad con prefijo, p.ej. new_id("crime") → "crime_1b2f3c4d5e6f7a80"."""
+    return f"{prefix}_{_generator.next_id():x}"
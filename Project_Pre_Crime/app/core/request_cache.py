@@ -0,0 +1,51 @@
+"""
+Memoización por petición HTTP.
+Dentro de una misma petición, las llamadas repetidas a una consulta decorada
+con los mismos argumentos comparten un único resultado (y una única tarea si
+se lanzan en paralelo). Fuera de una petición no se cachea nada.
+"""
+import asyncio
+import functools
+import inspect
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+_request_cache: ContextVar[Optional[Dict[Hashable, asyncio.Future]]] = ContextVar(
+    "request_cache", default=None
+)
+
+
+async def request_cache_scope():
+    """Dependencia FastAPI: abre una caché vacía para la petición en curso."""
+    token = _request_cache.set({})
+    try:
+        yield
+    finally:
+        _request_cache.reset(token)
+
+
+def request_cached(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+    """Decorador: memoiza la corrutina por (función, argumentos) dentro de la petición."""
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        cache = _request_cache.get()
+        if cache is None:
+            return await func(*args, **kwargs)
+        
+        # Argumentos normalizados: f(x, 30) y f(x, days=30) comparten entrada
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (func.__qualname__, tuple(bound.arguments.items()))
+        future = cache.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func(*args, **kwargs))
+            cache[key] = future
+            # Los errores no se memoizan: la siguiente llamada reintenta
+            future.add_done_callback(
+                lambda f: cache.pop(key, None) if not f.cancelled() and f.exception() else None
+            )
+        return await asyncio.shield(future)
+
+    return wrapper
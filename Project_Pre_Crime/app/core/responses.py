@@ -0,0 +1,94 @@
+"""
+Clases de respuesta HTTP de la API.
+Serialización JSON con orjson (implementado en C) en lugar del json estándar.
+"""
+import hashlib
+import orjson
+from typing import Any, AsyncIterable, AsyncIterator
+from fastapi import Request
+from fastapi.responses import ORJSONResponse
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _orjson_default(value: Any) -> Any:
+    """
+    Tipos que orjson no conoce: los temporales de Neo4j (DateTime, Date,
+    Duration...) que llegan tal cual desde las proyecciones Cypher.
+    """
+    if hasattr(value, "iso_format"):
+        return value.iso_format()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class PreCrimeJSONResponse(ORJSONResponse):
+    """
+    Respuesta JSON por defecto de la API.
+    Igual que ORJSONResponse, pero también serializa tipos NumPy
+    (float32, ndarray) producidos por el motor de inferencia y los
+    temporales de Neo4j de las respuestas que no pasan por jsonable_encoder.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=ORJSON_OPTIONS)
+
+
+async def stream_json_array(items: AsyncIterable[Any]) -> AsyncIterator[bytes]:
+    """
+    Serializa un iterable asíncrono como array JSON, elemento a elemento.
+    Pensado para StreamingResponse: el cliente recibe bytes antes de que
+    el último elemento esté listo y nunca se construye el payload completo.
+    """
+    yield b"["
+    first = True
+    async for item in items:
+        if not first:
+            yield b","
+        first = False
+        yield orjson.dumps(item, default=_orjson_default, option=ORJSON_OPTIONS)
+    yield b"]"
+
+
+async def prefetch_first(items: AsyncIterable[Any]) -> AsyncIterator[Any]:
+    """
+    Espera el primer elemento antes de devolver el iterable.
+    Los errores iniciales (conexión, primera consulta) se lanzan aquí, antes
+    de que StreamingResponse envíe el 200 y las cabeceras, y el router puede
+    convertirlos en un 500.
+    """
+    iterator = aiter(items)
+    try:
+        first = await anext(iterator)
+    except StopAsyncIteration:
+        first = None
+        iterator = None
+
+    async def chained() -> AsyncIterator[Any]:
+        if iterator is None:
+            return
+        yield first
+        async for item in iterator:
+            yield item
+
+    return chained()
+
+
+def weak_etag(*parts: Any) -> str:
+    """
+    Construye un ETag débil a partir de un resumen barato de los datos
+    (p.ej. último timestamp y número de filas), no del payload completo.
+    """
+    key = ":".join(str(part) for part in parts).encode()
+    return 'W/"%s"' % hashlib.blake2b(key, digest_size=8).hexdigest()
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True si la cabecera If-None-Match del cliente incluye el ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Comparación débil: se ignora el prefijo W/
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
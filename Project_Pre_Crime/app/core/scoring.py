@@ -0,0 +1,84 @@
+"""
+Kernels de puntuación de riesgo para ubicaciones.
+Calcula score ponderado y tramo de riesgo sobre columnas NumPy contiguas.
+
+Con Numba instalado el kernel se compila (cache=True amortiza la compilación
+entre arranques); sin Numba se usa la versión vectorizada con NumPy.
+"""
+import numpy as np
+from typing import Tuple
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Pesos del score: 60% histórico, 30% reciente, 10% ambiental (env_risk * 10)
+HISTORICAL_WEIGHT = 0.6
+RECENT_WEIGHT = 0.3
+ENV_WEIGHT = 10 * 0.1
+
+
+def _score_locations_numpy(
+    historical: np.ndarray,
+    recent: np.ndarray,
+    env_risk: np.ndarray,
+    thresholds: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Versión NumPy: scores y tramo (número de umbrales superados)."""
+    scores = (historical * HISTORICAL_WEIGHT) + (recent * RECENT_WEIGHT) + (env_risk * ENV_WEIGHT)
+    return scores, np.searchsorted(thresholds, scores, side="right")
+
+
+if NUMBA_AVAILABLE:
+    # Serie (sin parallel=True) por el mismo motivo que en app.core.features:
+    # el pool de hilos de Numba bloquea el cierre si se invoca fuera del hilo principal.
+    @njit(cache=True)
+    def _score_locations_numba(historical, recent, env_risk, thresholds):
+        """Kernel: una pasada por ubicación, score y tramo sin arrays temporales."""
+        n = historical.shape[0]
+        scores = np.empty(n, np.float64)
+        labels = np.empty(n, np.int64)
+        for i in range(n):
+            score = (historical[i] * HISTORICAL_WEIGHT) + (recent[i] * RECENT_WEIGHT) + (env_risk[i] * ENV_WEIGHT)
+            scores[i] = score
+            label = 0
+            for threshold in thresholds:
+                if score >= threshold:
+                    label += 1
+            labels[i] = label
+        return scores, labels
+
+
+
+def score_locations(
+    historical: np.ndarray,
+    recent: np.ndarray,
+    env_risk: np.ndarray,
+    thresholds: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Puntúa un lote de ubicaciones.
+    
+    Args:
+        historical: Crímenes históricos [N] float64
+        recent: Crímenes recientes [N] float64
+        env_risk: Riesgo ambiental [N] float64
+        thresholds: Umbrales de tramo ordenados (float64)
+        
+    Returns:
+        (scores [N], índice de tramo [N]) para indexar la tabla de etiquetas
+    """
+    if NUMBA_AVAILABLE:
+        return _score_locations_numba(historical, recent, env_risk, thresholds)
+    return _score_locations_numpy(historical, recent, env_risk, thresholds)
+
+
+def warm_up() -> None:
+    """
+    Compila (o carga de la caché en disco) el kernel en el arranque, para
+    que la primera petición a /locations no bloquee el event loop con la JIT.
+    """
+    one = np.zeros(1, dtype=np.float64)
+    score_locations(one, one, one, one)
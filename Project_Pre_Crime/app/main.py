@@ -2,13 +2,17 @@
 Pre-Crime Department API - Punto de Entrada Principal
 Sistema de predicción de crímenes usando Graph Neural Networks.
 """
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 
 from app.core.database import db_manager
 from app.core.ai_engine import precog_system
+from app.core.request_cache import request_cache_scope
+from app.core.responses import PreCrimeJSONResponse
+from app.core import scoring
+from app.services.prediction_recorder import prediction_recorder
 from app.routers import citizens, predictions, locations, crimes
 from app.models.schemas import HealthCheck
 from app.config import settings
@@ -36,12 +40,19 @@ async def lifespan(app: FastAPI):
         db_connected = await db_manager.check_connection()
         if db_connected:
             logger.info("✅ Conexión a Neo4j establecida")
+            await db_manager.ensure_schema()
         else:
             logger.warning("⚠️ Neo4j no responde. API funcionará en modo limitado.")
         
+        # Registro de predicciones en lote (background)
+        prediction_recorder.start()
+        
         # Cargar modelos de IA
         precog_system.load_models()
         
+        # Kernel de puntuación de ubicaciones (listado /locations)
+        scoring.warm_up()
+        
         logger.info("🚀 Sistema Pre-Crime operativo")
         
     except Exception as e:
@@ -52,6 +63,7 @@ async def lifespan(app: FastAPI):
     
     # ===== SHUTDOWN =====
     logger.info("🛑 Apagando sistema Pre-Crime...")
+    await prediction_recorder.stop()
     await db_manager.close()
     logger.info("👋 Sistema detenido correctamente")
 
@@ -61,6 +73,8 @@ app = FastAPI(
     version=settings.API_VERSION,
     description=settings.API_DESCRIPTION,
     lifespan=lifespan,
+    default_response_class=PreCrimeJSONResponse,
+    dependencies=[Depends(request_cache_scope)],
     docs_url="/docs",
     redoc_url="/redoc"
 )
@@ -136,11 +150,14 @@ async def system_info():
 async def global_exception_handler(request, exc):
     """Captura errores no manejados y devuelve respuesta estructurada."""
     logger.error(f"Error no manejado: {exc}", exc_info=True)
-    return {
-        "error": "Internal Server Error",
-        "detail": str(exc),
-        "path": str(request.url)
-    }
+    return PreCrimeJSONResponse(
+        status_code=500,
+        content={
+            "error": "Internal Server Error",
+            "detail": str(exc),
+            "path": str(request.url)
+        }
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -38,6 +38,6 @@ except ImportError as e:
             self.fc = nn.Linear(in_channels, out_channels)
         
         def forward(self, x, edge_index):
-            return torch.sigmoid(self.fc(x))
+            return self.fc(x)
     
     __all__ = ['CrimeGenerator', 'PoliceDiscriminator']
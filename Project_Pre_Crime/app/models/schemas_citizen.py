@@ -9,8 +9,9 @@ Arquitectura:
   CitizenFeatureVector: Para inferencia con IA
   PredictionOutput: Resultado de análisis
 """
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+import numpy as np
+from pydantic import BaseModel, Field, ConfigDict, PlainSerializer, PlainValidator, WithJsonSchema
+from typing import Annotated, Any, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -121,12 +122,28 @@ class CitizenUpdate(BaseModel):
             }
         }
 
+def _as_float32_array(value) -> np.ndarray:
+    """Acepta listas o arrays; un array float32 se usa tal cual (sin copia)."""
+    return np.asarray(value, dtype=np.float32)
+
+# Vector numérico para IA: ndarray float32 en memoria, lista de floats en JSON
+# (Any porque Pydantic no genera esquema para np.ndarray; lo valida _as_float32_array)
+FloatVector = Annotated[
+    Any,
+    PlainValidator(_as_float32_array),
+    PlainSerializer(lambda v: v.tolist(), return_type=List[float]),
+    WithJsonSchema({"type": "array", "items": {"type": "number"}}),
+]
+
 class CitizenFeatureVector(Citizen):
     """
     Ciudadano enriquecido con vector de características para IA.
     Incluye normalizaciones y encodings para modelos PyTorch.
     """
-    job_vector: List[float] = Field(default_factory=list, description="Vector one-hot del trabajo")
+    job_vector: FloatVector = Field(
+        default_factory=lambda: np.zeros(0, dtype=np.float32),
+        description="Vector one-hot del trabajo"
+    )
     age_normalized: Optional[float] = Field(None, ge=0.0, le=1.0, description="Edad normalizada")
     
     class Config:
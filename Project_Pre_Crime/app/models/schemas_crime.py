@@ -2,9 +2,9 @@
 Schemas para Crimes (Eventos Criminales).
 Define estructura de datos para crímenes registrados en la ciudad.
 """
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, computed_field
 from typing import Optional
-from datetime import datetime, date
+from datetime import datetime, timezone, date as Date
 from enum import Enum
 
 class CrimeType(str, Enum):
@@ -40,7 +40,7 @@ class CrimeBase(BaseModel):
 
 class CrimeCreate(CrimeBase):
     """Schema para CREAR un crimen."""
-    date: date = Field(..., description="Fecha del incidente")
+    date: Date = Field(..., description="Fecha del incidente")
     perpetrator_id: Optional[int] = Field(None, description="ID del perpetrador")
     location_id: str = Field(..., description="ID de la ubicación")
     witnesses_count: Optional[int] = Field(None, ge=0, description="Número de testigos")
@@ -64,25 +64,32 @@ class Crime(CrimeBase):
     Incluye datos enriquecidos del grafo.
     """
     id: str = Field(..., description="ID único del crimen")
-    date: date = Field(..., description="Fecha del incidente")
+    date: int = Field(..., description="Fecha del incidente (epoch en segundos, UTC)")
     perpetrator_name: Optional[str] = Field(None, description="Nombre del perpetrador")
     location_name: str = Field(..., description="Nombre de la ubicación")
     location_type: str = Field(..., description="Tipo de ubicación")
-    created_at: Optional[datetime] = Field(None, description="Timestamp de registro")
+    created_at: Optional[int] = Field(None, description="Timestamp de registro (epoch en ms, timestamp() de Neo4j)")
+    
+    @computed_field
+    @property
+    def date_iso(self) -> str:
+        """Fecha del incidente en formato ISO (solo se calcula al serializar)."""
+        return datetime.fromtimestamp(self.date, tz=timezone.utc).date().isoformat()
     
     class Config:
         from_attributes = True
         json_schema_extra = {
             "example": {
                 "id": "crime_001",
-                "date": "2026-01-22",
+                "date": 1769040000,
+                "date_iso": "2026-01-22",
                 "crime_type": "Robbery",
                 "severity": 8,
                 "description": "Armed robbery at First National Bank",
                 "perpetrator_name": "John Anderton",
                 "location_name": "First National Bank",
                 "location_type": "Bank",
-                "created_at": "2026-01-22T14:30:00"
+                "created_at": 1769092200000
             }
         }
 
@@ -106,9 +113,13 @@ class CrimeStatistics(BaseModel):
     total_suspects: int
     date_range: str = Field(description="Rango de fechas de análisis")
 
+    class Config:
+        # Inmutable: las estadísticas cacheadas se comparten entre peticiones
+        frozen = True
+
 class CrimeTimeline(BaseModel):
     """Línea temporal de crímenes para análisis histórico."""
-    date: date
+    date: Date
     crimes_count: int
     total_severity: int
     affected_locations: int
@@ -108,6 +108,10 @@ class LocationHotspot(BaseModel):
     )
     last_crime_date: Optional[str] = Field(None, description="Fecha del último crimen")
 
+    class Config:
+        # Inmutable: los hotspots cacheados se comparten entre peticiones
+        frozen = True
+
 class LocationStatistics(BaseModel):
     """Estadísticas agregadas de ubicaciones."""
     total_locations: int
@@ -9,6 +9,28 @@ from app.core.database import db_manager
 
 logger = logging.getLogger("CitizenRepository")
 
+# Perfil completo de ciudadanos (red social + grado criminal).
+# Compartido por la consulta individual y la de lotes para que
+# /precogs/scan y /precogs/batch-scan usen exactamente los mismos datos.
+CITIZEN_PROFILE_QUERY = """
+UNWIND $cids AS cid
+MATCH (c:Citizen {id: cid})
+// Calcular red social
+OPTIONAL MATCH (c)-[:KNOWS]-(friend:Citizen)
+WITH c, count(distinct friend) as social_network_size
+// Calcular grado criminal
+OPTIONAL MATCH (c)-[:KNOWS]-(criminal:Citizen)-[:COMMITTED_CRIME]->()
+WITH c, social_network_size, count(distinct criminal) as criminal_degree
+RETURN c.id as id, 
+       c.name as name, 
+       c.born as born,
+       c.status as status, 
+       c.job as job,
+       c.risk_seed as risk_seed,
+       social_network_size,
+       criminal_degree
+"""
+
 class CitizenRepository:
     """
     Encapsula toda la lógica de acceso a datos para Ciudadanos.
@@ -58,26 +80,24 @@ class CitizenRepository:
         Returns:
             Diccionario con datos del ciudadano o None
         """
-        query = """
-        MATCH (c:Citizen {id: $cid})
-        // Calcular red social
-        OPTIONAL MATCH (c)-[:KNOWS]-(friend:Citizen)
-        WITH c, count(distinct friend) as social_network_size
-        // Calcular grado criminal
-        OPTIONAL MATCH (c)-[:KNOWS]-(criminal:Citizen)-[:COMMITTED_CRIME]->()
-        WITH c, social_network_size, count(distinct criminal) as criminal_degree
-        RETURN c.id as id, 
-               c.name as name, 
-               c.born as born,
-               c.status as status, 
-               c.job as job,
-               c.risk_seed as risk_seed,
-               social_network_size,
-               criminal_degree
-        """
-        results = await db_manager.query(query, {"cid": citizen_id})
+        results = await self.find_by_ids([citizen_id])
         return results[0] if results else None
 
+    async def find_by_ids(self, citizen_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Recupera varios ciudadanos con sus métricas en un único round-trip.
+        Los IDs inexistentes se omiten del resultado.
+        
+        Args:
+            citizen_ids: IDs de los ciudadanos
+            
+        Returns:
+            Lista de ciudadanos enriquecidos
+        """
+        if not citizen_ids:
+            return []
+        return await db_manager.query(CITIZEN_PROFILE_QUERY, {"cids": citizen_ids})
+
     async def find_by_name(self, name: str, limit: int = 20) -> List[Dict[str, Any]]:
         """
         Búsqueda de ciudadanos por nombre (case-insensitive).
@@ -112,6 +132,8 @@ class CitizenRepository:
         
         Esta es la query que Spring Data tendría dificultades generando automáticamente.
         Buscamos ciudadanos con high risk_seed Y contactos criminales.
+        El filtro por risk_seed usa el índice de rango citizen_risk_seed
+        (verificable con PROFILE: NodeIndexSeekByRange).
         
         Args:
             threshold: Umbral mínimo de risk_seed
@@ -122,11 +144,15 @@ class CitizenRepository:
         query = """
         MATCH (c:Citizen)
         WHERE c.risk_seed > $threshold
-        // Encontrar criminales conocidos
-        MATCH (c)-[:KNOWS]-(associate:Citizen)-[*1..2]-(:Location)<-[:COMMITTED_CRIME]-(criminal)
-        WITH DISTINCT c, 
-             count(distinct criminal) as associated_criminals,
-             count(distinct associate) as criminal_contacts
+        // Subconsulta por ciudadano: la agregación se resuelve fila a fila
+        // sin producir el producto cartesiano antes del LIMIT
+        CALL {
+            WITH c
+            MATCH (c)-[:KNOWS]-(associate:Citizen)-[*1..2]-(:Location)<-[:COMMITTED_CRIME]-(criminal)
+            RETURN count(distinct criminal) as associated_criminals,
+                   count(distinct associate) as criminal_contacts
+        }
+        WITH c, associated_criminals, criminal_contacts
         WHERE associated_criminals > 0
         RETURN c.id as id,
                c.name as name,
@@ -11,6 +11,21 @@ from typing import List, Optional, Dict, Any
 from app.core.database import db_manager
 from datetime import datetime, date, timedelta
 
+# Proyección común de los listados de crímenes (variables crime, perp, loc).
+# CrimeService construye Crime sin validar, así que debe cubrir sus campos
+# obligatorios; ver app.core.contracts.
+CRIME_PROJECTION = """{
+            id: crime.id,
+            date: datetime({date: date(crime.date)}).epochSeconds,
+            crime_type: crime.crime_type,
+            severity: crime.severity,
+            description: crime.description,
+            perpetrator_name: perp.name,
+            location_name: loc.name,
+            location_type: loc.location_type,
+            created_at: crime.created_at
+        }"""
+
 
 class CrimeRepository:
     """
@@ -33,22 +48,12 @@ class CrimeRepository:
         MATCH (crime:Crime)
         OPTIONAL MATCH (crime)-[:PERPETRATOR_OF]-(perp:Citizen)
         OPTIONAL MATCH (crime)-[:LOCATION_OF]-(loc:Location)
-        RETURN {
-            id: crime.id,
-            date: crime.date,
-            crime_type: crime.crime_type,
-            severity: crime.severity,
-            description: crime.description,
-            perpetrator_name: perp.name,
-            location_name: loc.name,
-            location_type: loc.location_type,
-            created_at: crime.created_at
-        } as crime
+        RETURN """ + CRIME_PROJECTION + """ as crime
         ORDER BY crime.date DESC
         LIMIT $limit
         """
         records = await db_manager.query(query, {"limit": limit})
-        return [record.data()["crime"] for record in records]
+        return [record["crime"] for record in records]
 
     @staticmethod
     async def find_by_id(crime_id: str) -> Optional[Dict[str, Any]]:
@@ -65,21 +70,11 @@ class CrimeRepository:
         MATCH (crime:Crime {id: $crime_id})
         OPTIONAL MATCH (crime)-[:PERPETRATOR_OF]-(perp:Citizen)
         OPTIONAL MATCH (crime)-[:LOCATION_OF]-(loc:Location)
-        RETURN {
-            id: crime.id,
-            date: crime.date,
-            crime_type: crime.crime_type,
-            severity: crime.severity,
-            description: crime.description,
-            perpetrator_name: perp.name,
-            location_name: loc.name,
-            location_type: loc.location_type,
-            created_at: crime.created_at
-        } as crime
+        RETURN """ + CRIME_PROJECTION + """ as crime
         """
         result = await db_manager.query(query, {"crime_id": crime_id})
         if result:
-            return result[0].data()["crime"]
+            return result[0]["crime"]
         return None
 
     @staticmethod
@@ -99,22 +94,12 @@ class CrimeRepository:
         WHERE crime.date >= date() - duration('P' + $days + 'D')
         OPTIONAL MATCH (crime)-[:PERPETRATOR_OF]-(perp:Citizen)
         OPTIONAL MATCH (crime)-[:LOCATION_OF]-(loc:Location)
-        RETURN {
-            id: crime.id,
-            date: crime.date,
-            crime_type: crime.crime_type,
-            severity: crime.severity,
-            description: crime.description,
-            perpetrator_name: perp.name,
-            location_name: loc.name,
-            location_type: loc.location_type,
-            created_at: crime.created_at
-        } as crime
+        RETURN """ + CRIME_PROJECTION + """ as crime
         ORDER BY crime.date DESC
         LIMIT $limit
         """
         records = await db_manager.query(query, {"days": days, "limit": limit})
-        return [record.data()["crime"] for record in records]
+        return [record["crime"] for record in records]
 
     @staticmethod
     async def find_by_type(crime_type: str, days: int = 90) -> List[Dict[str, Any]]:
@@ -133,18 +118,11 @@ class CrimeRepository:
         WHERE crime.date >= date() - duration('P' + $days + 'D')
         OPTIONAL MATCH (crime)-[:PERPETRATOR_OF]-(perp:Citizen)
         OPTIONAL MATCH (crime)-[:LOCATION_OF]-(loc:Location)
-        RETURN {
-            id: crime.id,
-            date: crime.date,
-            crime_type: crime.crime_type,
-            severity: crime.severity,
-            perpetrator_name: perp.name,
-            location_name: loc.name
-        } as crime
+        RETURN """ + CRIME_PROJECTION + """ as crime
         ORDER BY crime.date DESC
         """
         records = await db_manager.query(query, {"crime_type": crime_type, "days": days})
-        return [record.data()["crime"] for record in records]
+        return [record["crime"] for record in records]
 
     @staticmethod
     async def find_by_location(location_id: str, limit: int = 50) -> List[Dict[str, Any]]:
@@ -161,19 +139,12 @@ class CrimeRepository:
         query = """
         MATCH (loc:Location {id: $location_id})-[:LOCATION_OF]-(crime:Crime)
         OPTIONAL MATCH (crime)-[:PERPETRATOR_OF]-(perp:Citizen)
-        RETURN {
-            id: crime.id,
-            date: crime.date,
-            crime_type: crime.crime_type,
-            severity: crime.severity,
-            description: crime.description,
-            perpetrator_name: perp.name
-        } as crime
+        RETURN """ + CRIME_PROJECTION + """ as crime
         ORDER BY crime.date DESC
         LIMIT $limit
         """
         records = await db_manager.query(query, {"location_id": location_id, "limit": limit})
-        return [record.data()["crime"] for record in records]
+        return [record["crime"] for record in records]
 
     @staticmethod
     async def find_by_perpetrator(perpetrator_id: int, limit: int = 50) -> List[Dict[str, Any]]:
@@ -190,18 +161,12 @@ class CrimeRepository:
         query = """
         MATCH (perp:Citizen {id: $perpetrator_id})-[:PERPETRATOR_OF]-(crime:Crime)
         OPTIONAL MATCH (crime)-[:LOCATION_OF]-(loc:Location)
-        RETURN {
-            id: crime.id,
-            date: crime.date,
-            crime_type: crime.crime_type,
-            severity: crime.severity,
-            location_name: loc.name
-        } as crime
+        RETURN """ + CRIME_PROJECTION + """ as crime
         ORDER BY crime.date DESC
         LIMIT $limit
         """
         records = await db_manager.query(query, {"perpetrator_id": perpetrator_id, "limit": limit})
-        return [record.data()["crime"] for record in records]
+        return [record["crime"] for record in records]
 
     @staticmethod
     async def create(crime_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -231,7 +196,7 @@ class CrimeRepository:
         CREATE (perp)-[:PERPETRATOR_OF]->(crime)
         RETURN {
             id: crime.id,
-            date: crime.date,
+            date: datetime({date: date(crime.date)}).epochSeconds,
             crime_type: crime.crime_type,
             severity: crime.severity,
             created_at: crime.created_at
@@ -377,3 +342,25 @@ class CrimeRepository:
         if result:
             return result[0].data()["related_citizens"]
         return {"perpetrator": None, "victim": None, "witnesses": []}
+
+    @staticmethod
+    async def count_related_citizens(crime_id: str) -> int:
+        """
+        Cuenta los ciudadanos relacionados a un crimen (perpetrador, víctimas
+        y testigos) sin transferir sus datos.
+        
+        Args:
+            crime_id: ID del crimen
+            
+        Returns:
+            Número de ciudadanos distintos relacionados
+        """
+        query = """
+        MATCH (crime:Crime {id: $crime_id})
+        OPTIONAL MATCH (citizen:Citizen)-[rel:PERPETRATOR_OF|HAS_VICTIM|HAS_WITNESS]-(crime)
+        RETURN COUNT(DISTINCT citizen) as total
+        """
+        result = await db_manager.query(query, {"crime_id": crime_id})
+        if result:
+            return result[0]["total"]
+        return 0
@@ -7,10 +7,28 @@ Responsabilidades:
   - Calcular estadísticas de ubicaciones
   - Enriquecer datos de ubicaciones con información de crímenes
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator
 from app.core.database import db_manager
+from app.core.request_cache import request_cached
 from datetime import datetime, timedelta
 
+ALL_LOCATIONS_QUERY = """
+MATCH (loc:Location)
+OPTIONAL MATCH (loc)-[:LOCATION_OF]-(crime:Crime)
+WITH loc, COUNT(DISTINCT crime) as crime_count
+RETURN {
+    id: loc.id,
+    name: loc.name,
+    location_type: loc.location_type,
+    env_risk: loc.env_risk,
+    latitude: loc.latitude,
+    longitude: loc.longitude,
+    historical_crime_count: crime_count,
+    recent_crime_count: 0  // Será calculado en servicio
+} as location
+ORDER BY crime_count DESC
+"""
+
 
 class LocationRepository:
     """
@@ -26,29 +44,25 @@ class LocationRepository:
         Returns:
             Lista de ubicaciones con estadísticas de crímenes
         """
-        query = """
-        MATCH (loc:Location)
-        OPTIONAL MATCH (loc)-[:LOCATION_OF]-(crime:Crime)
-        WITH loc, COUNT(DISTINCT crime) as crime_count
-        RETURN {
-            id: loc.id,
-            name: loc.name,
-            location_type: loc.location_type,
-            env_risk: loc.env_risk,
-            latitude: loc.latitude,
-            longitude: loc.longitude,
-            historical_crime_count: crime_count,
-            recent_crime_count: 0  # Será calculado en servicio
-        } as location
-        ORDER BY crime_count DESC
+        records = await db_manager.query(ALL_LOCATIONS_QUERY)
+        return [record["location"] for record in records]
+
+    @staticmethod
+    async def stream_all() -> AsyncIterator[Dict[str, Any]]:
+        """
+        Igual que find_all, pero produce las ubicaciones según las envía Neo4j.
+        
+        Yields:
+            Ubicaciones con estadísticas de crímenes
         """
-        records = await db_manager.query(query)
-        return [record.data()["location"] for record in records]
+        async for record in db_manager.stream(ALL_LOCATIONS_QUERY):
+            yield record["location"]
 
     @staticmethod
+    @request_cached
     async def find_by_id(location_id: str) -> Optional[Dict[str, Any]]:
         """
-        Obtiene una ubicación por su ID.
+        Obtiene una ubicación por su ID (memoizado por petición).
         
         Args:
             location_id: ID de la ubicación
@@ -82,7 +96,7 @@ class LocationRepository:
         """
         result = await db_manager.query(query, {"location_id": location_id})
         if result:
-            return result[0].data()["location"]
+            return result[0]["location"]
         return None
 
     @staticmethod
@@ -240,9 +254,30 @@ class LocationRepository:
         }
 
     @staticmethod
+    async def count_recent_crimes_by_location(days: int = 30) -> Dict[str, int]:
+        """
+        Cuenta los crímenes recientes de todas las ubicaciones en una sola consulta.
+        
+        Args:
+            days: Número de días hacia atrás
+            
+        Returns:
+            Diccionario {location_id: número de crímenes recientes};
+            las ubicaciones sin crímenes recientes no aparecen
+        """
+        query = """
+        MATCH (loc:Location)-[:LOCATION_OF]-(crime:Crime)
+        WHERE crime.date >= date() - duration({days: $days})
+        RETURN loc.id as location_id, COUNT(DISTINCT crime) as recent_count
+        """
+        records = await db_manager.query(query, {"days": days})
+        return {record["location_id"]: record["recent_count"] for record in records}
+
+    @staticmethod
+    @request_cached
     async def find_nearby_crimes(location_id: str, days: int = 30) -> List[Dict[str, Any]]:
         """
-        Obtiene crímenes recientes en una ubicación.
+        Obtiene crímenes recientes en una ubicación (memoizado por petición).
         
         Args:
             location_id: ID de la ubicación
@@ -264,4 +299,4 @@ class LocationRepository:
         ORDER BY crime.date DESC
         """
         records = await db_manager.query(query, {"location_id": location_id, "days": days})
-        return [record.data()["crime"] for record in records]
+        return [record["crime"] for record in records]
@@ -55,36 +55,68 @@ class PredictionRepository:
         })
         
         if result:
-            logger.info(f"🔴 Predicción registrada: Ciudadano #{citizen_id} → {verdict}")
+            logger.info("🔴 Predicción registrada: Ciudadano #%d → %s", citizen_id, verdict)
             return result[0]
         return {}
 
-    async def get_prediction_history(
+    async def record_predictions(self, predictions: List[Dict[str, Any]]) -> int:
+        """
+        Registra varias predicciones en una sola transacción (UNWIND).
+        
+        Args:
+            predictions: Lista de {cid, prob, conf, verdict}
+            
+        Returns:
+            Número de predicciones registradas
+        """
+        if not predictions:
+            return 0
+        
+        query = """
+        UNWIND $rows AS row
+        MATCH (c:Citizen {id: row.cid})
+        CREATE (c)-[pred:RED_BALL_PREDICTED]->(c)
+        SET pred.probability = row.prob,
+            pred.confidence = row.conf,
+            pred.verdict = row.verdict,
+            pred.timestamp = datetime(),
+            pred.status = 'ACTIVE'
+        """
+        summary = await db_manager.execute_write(query, {"rows": predictions})
+        created = summary.counters.relationships_created
+        logger.info("🔴 %d predicciones registradas en lote", created)
+        return created
+
+    async def find_citizen_with_history(
         self, 
         citizen_id: int, 
         limit: int = 20
-    ) -> List[Dict[str, Any]]:
+    ) -> Optional[Dict[str, Any]]:
         """
-        Obtiene historial de predicciones para un ciudadano.
+        Obtiene el ciudadano y su historial de predicciones en un solo round-trip.
         
         Args:
             citizen_id: ID del ciudadano
             limit: Máximo de registros
             
         Returns:
-            Lista de predicciones previas
+            {"citizen": {id, name}, "history": [...]} o None si no existe.
+            Cada fila del historial trae siempre `probability` (nunca null).
         """
         query = """
-        MATCH (c:Citizen {id: $cid})-[pred:RED_BALL_PREDICTED]->(c)
-        RETURN pred.timestamp as timestamp,
-               pred.probability as probability,
-               pred.confidence as confidence,
-               pred.verdict as verdict,
-               pred.status as status
+        MATCH (c:Citizen {id: $cid})
+        OPTIONAL MATCH (c)-[pred:RED_BALL_PREDICTED]->(c)
+        WITH c, pred
         ORDER BY pred.timestamp DESC
-        LIMIT $limit
+        WITH c, collect(pred {
+            .timestamp, .confidence, .verdict, .status,
+            probability: coalesce(pred.probability, 0.0)
+        }) as history
+        RETURN c {.id, .name} as citizen,
+               history[0..$limit] as history
         """
-        return await db_manager.query(query, {"cid": citizen_id, "limit": limit})
+        result = await db_manager.query(query, {"cid": citizen_id, "limit": limit})
+        return result[0] if result else None
 
     async def get_average_risk_by_period(
         self, 
@@ -124,14 +156,14 @@ class PredictionRepository:
             limit: Máximo de resultados
             
         Returns:
-            Lista de intervenciones requeridas
+            Lista de intervenciones requeridas (`probability` siempre presente)
         """
         query = """
         MATCH (c:Citizen)-[pred:RED_BALL_PREDICTED]->(c)
         WHERE pred.verdict = 'INTERVENE' AND pred.status = $status
         RETURN c.id as citizen_id,
                c.name as citizen_name,
-               pred.probability as probability,
+               coalesce(pred.probability, 0.0) as probability,
                pred.timestamp as predicted_at,
                pred.confidence as confidence
         ORDER BY pred.probability DESC, pred.timestamp DESC
@@ -139,6 +171,33 @@ class PredictionRepository:
         """
         return await db_manager.query(query, {"status": status, "limit": limit})
 
+    async def get_version_stamp(self) -> Dict[str, Any]:
+        """
+        Resumen barato del estado de las predicciones para validar cachés:
+        última escritura y última resolución. Cada una es la primera entrada
+        de un índice de rango ordenado (prediction_timestamp /
+        prediction_resolved_at), sin recorrer las relaciones ni bloquear a
+        los escritores.
+        
+        Returns:
+            Diccionario {last_predicted, last_resolved}
+        """
+        query = """
+        OPTIONAL MATCH ()-[pred:RED_BALL_PREDICTED]->()
+        WHERE pred.timestamp IS NOT NULL
+        WITH pred ORDER BY pred.timestamp DESC LIMIT 1
+        WITH pred.timestamp as last_predicted
+        OPTIONAL MATCH ()-[res:RED_BALL_PREDICTED]->()
+        WHERE res.resolved_at IS NOT NULL
+        WITH last_predicted, res ORDER BY res.resolved_at DESC LIMIT 1
+        RETURN toString(last_predicted) as last_predicted,
+               toString(res.resolved_at) as last_resolved
+        """
+        result = await db_manager.query(query)
+        if result:
+            return result[0]
+        return {"last_predicted": None, "last_resolved": None}
+
     async def count_verdicts_by_type(self, days: int = 7) -> Dict[str, int]:
         """
         Cuenta predicciones por veredicto en un período.
@@ -183,7 +242,7 @@ class PredictionRepository:
         RETURN pred
         """
         result = await db_manager.execute_write(query, {"cid": citizen_id})
-        logger.info(f"Intervención para ciudadano #{citizen_id} marcada como RESOLVED")
+        logger.info("Intervención para ciudadano #%d marcada como RESOLVED", citizen_id)
         return result is not None
 
     async def get_prediction_accuracy(
@@ -39,6 +39,32 @@ async def list_citizens(
         logger.error(f"Error listando ciudadanos: {e}")
         raise HTTPException(status_code=500, detail="Error interno al listar ciudadanos")
 
+@router.get("/batch", response_model=List[Citizen])
+async def get_citizens_batch(
+    ids: List[int] = Query(..., description="IDs de ciudadanos a obtener"),
+    max_batch: int = Query(100, ge=1, le=100, description="Máximo de ciudadanos")
+):
+    """
+    Obtiene varios ciudadanos en una sola consulta (pantallas de vigilancia).
+
+    Devuelve los ciudadanos en el orden de los IDs; los inexistentes se omiten.
+    Declarado antes de /{citizen_id} para que "batch" no se tome como ID.
+    """
+    # Eliminar duplicados preservando el orden de llegada
+    ids = list(dict.fromkeys(ids))
+
+    if len(ids) > max_batch:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Máximo {max_batch} ciudadanos por consulta"
+        )
+
+    try:
+        return await citizen_service.get_citizens(ids)
+    except Exception as e:
+        logger.error(f"Error obteniendo ciudadanos en lote: {e}")
+        raise HTTPException(status_code=500, detail="Error interno al obtener ciudadanos")
+
 @router.get("/{citizen_id}", response_model=Citizen)
 async def get_citizen(citizen_id: int):
     """
@@ -100,13 +126,7 @@ async def get_high_risk_analysis(
     Análisis de ciudadanos de alto riesgo.
     Utilitario para jefe de policía.
     """
-    suspects = await citizen_service.get_high_risk_suspects(threshold)
-    
-    return {
-        "threshold": threshold,
-        "count": len(suspects),
-        "suspects": suspects
-    }
+    return await citizen_service.get_high_risk_report(threshold)
 
 # ==================== POST ENDPOINTS ====================
 
@@ -12,11 +12,15 @@ Endpoints:
   GET  /crimes/admin/stats         - Estadísticas de crímenes
   GET  /crimes/admin/timeline      - Línea temporal de crímenes
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
+from pydantic import TypeAdapter
 from typing import List
 from app.services.crime_service import CrimeService
 from app.models.schemas_crime import Crime, CrimeCreate, CrimeReport, CrimeStatistics, CrimeTimeline
 
+# Serializador C de listas completas: un solo recorrido, bytes directos
+CRIMES_ADAPTER = TypeAdapter(List[Crime])
+
 router = APIRouter(
     prefix="/crimes",
     tags=["crimes"],
@@ -24,7 +28,7 @@ router = APIRouter(
 )
 
 
-@router.get("", response_model=List[Crime])
+@router.get("", response_class=Response, responses={200: {"model": List[Crime]}})
 async def list_crimes(limit: int = Query(50, ge=1, le=500)):
     """
     Obtiene todos los crímenes registrados.
@@ -37,12 +41,12 @@ async def list_crimes(limit: int = Query(50, ge=1, le=500)):
     """
     try:
         crimes = await CrimeService.get_all_crimes(limit)
-        return crimes
+        return _crimes_response(crimes)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo crímenes: {str(e)}")
 
 
-@router.get("/recent", response_model=List[Crime])
+@router.get("/recent", response_class=Response, responses={200: {"model": List[Crime]}})
 async def get_recent_activity(
     days: int = Query(30, ge=1, le=365),
     limit: int = Query(50, ge=1, le=500)
@@ -59,12 +63,12 @@ async def get_recent_activity(
     """
     try:
         crimes = await CrimeService.get_recent_activity(days, limit)
-        return crimes
+        return _crimes_response(crimes)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo actividad reciente: {str(e)}")
 
 
-@router.get("/type/{crime_type}", response_model=List[Crime])
+@router.get("/type/{crime_type}", response_class=Response, responses={200: {"model": List[Crime]}})
 async def get_crimes_by_type(
     crime_type: str,
     days: int = Query(90, ge=1, le=365)
@@ -83,14 +87,14 @@ async def get_crimes_by_type(
         crimes = await CrimeService.get_crimes_by_type(crime_type, days)
         if not crimes:
             raise HTTPException(status_code=404, detail=f"No se encontraron crímenes de tipo '{crime_type}'")
-        return crimes
+        return _crimes_response(crimes)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo crímenes: {str(e)}")
 
 
-@router.get("/location/{location_id}", response_model=List[Crime])
+@router.get("/location/{location_id}", response_class=Response, responses={200: {"model": List[Crime]}})
 async def get_crimes_at_location(
     location_id: str,
     limit: int = Query(50, ge=1, le=500)
@@ -107,12 +111,12 @@ async def get_crimes_at_location(
     """
     try:
         crimes = await CrimeService.get_crimes_at_location(location_id, limit)
-        return crimes
+        return _crimes_response(crimes)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo crímenes: {str(e)}")
 
 
-@router.get("/perpetrator/{perpetrator_id}", response_model=List[Crime])
+@router.get("/perpetrator/{perpetrator_id}", response_class=Response, responses={200: {"model": List[Crime]}})
 async def get_perpetrator_history(
     perpetrator_id: int,
     limit: int = Query(50, ge=1, le=500)
@@ -129,7 +133,7 @@ async def get_perpetrator_history(
     """
     try:
         crimes = await CrimeService.get_perpetrator_history(perpetrator_id, limit)
-        return crimes
+        return _crimes_response(crimes)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo historial: {str(e)}")
 
@@ -226,3 +230,8 @@ async def get_crime_timeline(days: int = Query(30, ge=1, le=365)):
         return timeline
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo timeline: {str(e)}")
+
+
+def _crimes_response(crimes: List[Crime]) -> Response:
+    """Serializa una lista de crímenes con CRIMES_ADAPTER."""
+    return Response(content=CRIMES_ADAPTER.dump_json(crimes), media_type="application/json")
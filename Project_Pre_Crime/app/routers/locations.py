@@ -10,7 +10,9 @@ Endpoints:
   GET  /locations/admin/stats  - Estadísticas de ubicaciones
 """
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from typing import List
+from app.core.responses import prefetch_first, stream_json_array
 from app.services.location_service import LocationService
 from app.models.schemas_location import Location, LocationCreate, LocationHotspot, LocationStatistics
 
@@ -21,19 +23,31 @@ router = APIRouter(
 )
 
 
-@router.get("", response_model=List[Location])
+@router.get(
+    "",
+    response_class=StreamingResponse,
+    responses={200: {"model": List[Location]}}
+)
 async def list_locations():
     """
     Obtiene todas las ubicaciones de la ciudad.
     
+    La respuesta se envía en streaming (array JSON incremental): cada
+    ubicación se serializa en cuanto llega de Neo4j. Los crímenes recientes
+    y la primera ubicación se esperan antes de responder, así que un fallo
+    de Neo4j en ese punto sigue devolviendo un 500.
+    
     Returns:
         Lista de ubicaciones con estadísticas de crímenes
     """
     try:
-        locations = await LocationService.get_all_locations()
-        return locations
+        locations = await prefetch_first(
+            location.model_dump(mode="json")
+            async for location in LocationService.iter_all_locations()
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error obteniendo ubicaciones: {str(e)}")
+    return StreamingResponse(stream_json_array(locations), media_type="application/json")
 
 
 @router.get("/hotspots", response_model=List[LocationHotspot])
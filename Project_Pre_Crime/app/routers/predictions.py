@@ -6,12 +6,12 @@ Arquit arquitectura:
   Router (HTTP) → Service (Lógica Pre-Crime) → Repository (Persistencia)
 """
 import logging
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, status
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query, Request, Response, status
 from datetime import datetime
+from app.core.responses import PreCrimeJSONResponse, etag_matches
 from app.services.prediction_service import prediction_service
 from app.services.citizen_service import citizen_service
 from app.models.schemas import PredictionOutput
-from app.config import settings
 
 logger = logging.getLogger("PredictionsRouter")
 
@@ -57,7 +57,7 @@ async def scan_citizen(citizen_id: int):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error en predicción: {e}", exc_info=True)
+        logger.error("Error en predicción: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error durante análisis Pre-Crime"
@@ -74,40 +74,45 @@ async def batch_scan(
     
     Retorna resumen con estadísticas de verdicts.
     """
+    # Eliminar duplicados preservando el orden de llegada
+    citizen_ids = list(dict.fromkeys(citizen_ids))
+    
+    if not citizen_ids:
+        return {
+            "total_scanned": 0,
+            "verdicts": {"intervene": 0, "watchlist": 0, "safe": 0},
+            "results": []
+        }
+    
     if len(citizen_ids) > max_batch:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Máximo {max_batch} ciudadanos por batch"
         )
     
-    results = []
+    try:
+        citizens_features = await citizen_service.enrich_citizens_for_inference_batch(citizen_ids)
+        predictions = await prediction_service.predict_batch(citizens_features)
+    except Exception as e:
+        logger.error("Error en análisis por lotes: %s", e, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error durante análisis Pre-Crime por lotes"
+        )
     
-    for cid in citizen_ids:
-        try:
-            citizen_features = await citizen_service.enrich_citizen_for_inference(cid)
-            if citizen_features:
-                prediction = await prediction_service.predict_citizen_risk(citizen_features)
-                results.append({
-                    "citizen_id": cid,
-                    "verdict": prediction.verdict,
-                    "probability": prediction.probability
-                })
-        except Exception as e:
-            logger.warning(f"Saltando ciudadano {cid}: {e}")
-            continue
-    
-    # Estadísticas
-    intervene_count = sum(1 for r in results if r["verdict"] == "INTERVENE")
-    watchlist_count = sum(1 for r in results if r["verdict"] == "WATCHLIST")
-    safe_count = sum(1 for r in results if r["verdict"] == "SAFE")
+    results = []
+    verdicts = {"intervene": 0, "watchlist": 0, "safe": 0}
+    for prediction in predictions:
+        verdicts[prediction.verdict.lower()] += 1
+        results.append({
+            "citizen_id": prediction.subject_id,
+            "verdict": prediction.verdict,
+            "probability": prediction.probability
+        })
     
     return {
         "total_scanned": len(results),
-        "verdicts": {
-            "intervene": intervene_count,
-            "watchlist": watchlist_count,
-            "safe": safe_count
-        },
+        "verdicts": verdicts,
         "results": results
     }
 
@@ -121,16 +126,7 @@ async def get_high_risk_citizens(
     Lista ciudadanos de alto riesgo basándose en su risk_seed.
     Útil para priorizar análisis detallados.
     """
-    if threshold is None:
-        threshold = settings.RISK_THRESHOLD_WATCHLIST
-    
-    suspects = await citizen_service.get_high_risk_suspects(threshold)
-    
-    return {
-        "threshold": threshold,
-        "count": len(suspects),
-        "suspects": suspects
-    }
+    return await citizen_service.get_high_risk_report(threshold)
 
 @router.get("/{citizen_id}/history")
 async def get_prediction_history(
@@ -140,54 +136,71 @@ async def get_prediction_history(
     """
     Obtiene historial completo de predicciones para un ciudadano.
     Incluye análisis de tendencia de riesgo.
+    
+    Existencia del ciudadano e historial se resuelven en una sola consulta.
     """
-    # Verificar que el ciudadano existe
-    citizen = await citizen_service.get_citizen(citizen_id)
-    if not citizen:
+    history = await prediction_service.get_prediction_history(citizen_id, limit)
+    
+    if history is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Ciudadano #{citizen_id} no encontrado"
         )
     
-    history = await prediction_service.get_prediction_history(citizen_id, limit)
-    
-    return {
-        "citizen_id": citizen_id,
-        "citizen_name": citizen.get("name"),
-        **history
-    }
+    return history
 
 @router.get("/admin/interventions")
-async def get_active_interventions():
+async def get_active_interventions(request: Request):
     """
     Obtiene todas las intervenciones activas (Bolas Rojas).
     Dashboard para jefe de policía.
     
+    Soporta If-None-Match: si nada ha cambiado responde 304 sin cuerpo.
+    
     ⚠️ ENDPOINT SENSIBLE - Debería requerir autenticación
     """
+    etag = await prediction_service.get_dashboard_etag("interventions")
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag))
+    
     interventions = await prediction_service.get_active_interventions()
     
-    return {
-        "timestamp": datetime.now(),
-        "critical_alert": interventions["critical_count"] > 0,
-        **interventions
-    }
+    return PreCrimeJSONResponse(
+        content={
+            "timestamp": datetime.now(),
+            "critical_alert": interventions["critical_count"] > 0,
+            **interventions
+        },
+        headers=_cache_headers(etag)
+    )
 
 @router.get("/admin/statistics")
 async def get_prediction_statistics(
+    request: Request,
     days: int = Query(7, ge=1, le=365, description="Período en días")
 ):
     """
     Estadísticas de predicciones: volumen, precisión, tendencias.
     
+    Soporta If-None-Match: si nada ha cambiado responde 304 sin cuerpo.
+    
     ⚠️ ENDPOINT SENSIBLE - Debería requerir autenticación
     """
+    # La ventana de días se desplaza con el reloj: el ETag cambia cada minuto
+    window = datetime.now().strftime("%Y-%m-%dT%H:%M")
+    etag = await prediction_service.get_dashboard_etag("statistics", days, window)
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag))
+    
     stats = await prediction_service.get_prediction_statistics(days)
     
-    return {
-        "generated_at": datetime.now(),
-        **stats
-    }
+    return PreCrimeJSONResponse(
+        content={
+            "generated_at": datetime.now(),
+            **stats
+        },
+        headers=_cache_headers(etag)
+    )
 
 # ==================== ADMINISTRATIVE ENDPOINTS ====================
 
@@ -210,7 +223,7 @@ async def resolve_intervention(citizen_id: int):
     success = await prediction_service.mark_intervention_resolved(citizen_id)
     
     if success:
-        logger.info(f"Intervención para #{citizen_id} marcada como RESUELTA")
+        logger.info("Intervención para #%d marcada como RESUELTA", citizen_id)
         return {
             "citizen_id": citizen_id,
             "status": "RESOLVED",
@@ -224,6 +237,10 @@ async def resolve_intervention(citizen_id: int):
 
 # ==================== HELPER FUNCTIONS ====================
 
+def _cache_headers(etag: str) -> dict:
+    """Cabeceras de validación para los dashboards de administración."""
+    return {"ETag": etag, "Cache-Control": "private, max-age=30"}
+
 async def _background_register_prediction(
     citizen_id: int,
     probability: float,
@@ -231,7 +248,7 @@ async def _background_register_prediction(
 ):
     """Registra predicción en background (no bloquea respuesta)."""
     try:
-        logger.info(f"📝 Registrando predicción en background: #{citizen_id}")
+        logger.info("📝 Registrando predicción en background: #%d", citizen_id)
         # Aquí iría la persistencia si no se hizo en el Service
     except Exception as e:
-        logger.error(f"Error en background task: {e}")
+        logger.error("Error en background task: %s", e)
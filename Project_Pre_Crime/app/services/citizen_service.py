@@ -3,14 +3,26 @@ CitizenService: Servicios de negocio para ciudadanos.
 Encapsula lógica que va más allá de consultas de BD.
 Equivalente a @Service en Spring.
 """
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Tuple
 from app.repositories.citizen_repo import citizen_repository
+from app.core.cache import stats_cache
+from app.core.features import build_feature_arrays, encode_job
 from app.models.schemas import CitizenCreate, CitizenUpdate, CitizenFeatureVector
 from app.config import settings
 
 logger = logging.getLogger("CitizenService")
 
+# Descripciones legibles de cada estado (solo lectura)
+_STATUS_SUMMARIES = MappingProxyType({
+    "ACTIVE": "Ciudadano activo - Bajo perfil",
+    "WATCHLIST": "En lista de vigilancia - Monitoreo activo",
+    "DETAINED": "Detenido - Bajo custodia",
+    "CLEARED": "Absuelto - Registro limpio"
+})
+
 class CitizenService:
     """
     Servicios de negocio para operaciones con Ciudadanos.
@@ -27,8 +39,9 @@ class CitizenService:
         limit: int = 50, 
         offset: int = 0
     ) -> List[Dict[str, Any]]:
-        """Obtiene lista de ciudadanos con paginación."""
-        return await citizen_repository.find_all(limit, offset)
+        """Obtiene lista de ciudadanos con paginación (enriquecidos)."""
+        citizens = await citizen_repository.find_all(limit, offset)
+        return self._enrich_citizens(citizens)
 
     async def get_citizen(self, citizen_id: int) -> Optional[Dict[str, Any]]:
         """
@@ -42,12 +55,28 @@ class CitizenService:
         citizen = await citizen_repository.find_by_id(citizen_id)
         
         if citizen:
-            # Enriquecimiento de negocio
-            citizen["is_high_risk"] = citizen.get("risk_seed", 0) >= settings.RISK_THRESHOLD_WATCHLIST
-            citizen["status_summary"] = self._get_status_summary(citizen.get("status"))
+            self._enrich_citizens([citizen])
         
         return citizen
 
+    async def get_citizens(self, citizen_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Versión en lote de get_citizen: una sola consulta para todos los IDs.
+        
+        Args:
+            citizen_ids: IDs de los ciudadanos
+            
+        Returns:
+            Ciudadanos enriquecidos en el orden de entrada (se omiten los inexistentes)
+        """
+        if not citizen_ids:
+            return []
+        
+        citizens = await citizen_repository.find_by_ids(citizen_ids)
+        by_id = {citizen["id"]: citizen for citizen in citizens}
+        ordered = [by_id[cid] for cid in citizen_ids if cid in by_id]
+        return self._enrich_citizens(ordered)
+
     async def search_citizens(self, name: str) -> List[Dict[str, Any]]:
         """Busca ciudadanos por nombre."""
         return await citizen_repository.find_by_name(name)
@@ -66,9 +95,33 @@ class CitizenService:
             threshold = settings.RISK_THRESHOLD_WATCHLIST
         
         suspects = await citizen_repository.find_high_risk_suspects(threshold)
-        logger.info(f"🔴 Encontrados {len(suspects)} ciudadanos de alto riesgo (>{threshold})")
+        logger.info("🔴 Encontrados %d ciudadanos de alto riesgo (>%s)", len(suspects), threshold)
         return suspects
 
+    async def get_high_risk_report(self, threshold: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Respuesta completa de los endpoints de alto riesgo.
+        
+        Las filas de Neo4j ya llegan con las claves de la respuesta
+        (alias en el RETURN), así que se devuelven tal cual, sin remapear.
+        
+        Args:
+            threshold: Umbral de riesgo (usa settings si no se especifica)
+            
+        Returns:
+            {"threshold", "count", "suspects"}
+        """
+        if threshold is None:
+            threshold = settings.RISK_THRESHOLD_WATCHLIST
+        
+        suspects = await self.get_high_risk_suspects(threshold)
+        
+        return {
+            "threshold": threshold,
+            "count": len(suspects),
+            "suspects": suspects
+        }
+
     async def get_citizen_network(
         self, 
         citizen_id: int, 
@@ -86,11 +139,11 @@ class CitizenService:
         """
         network = await citizen_repository.find_network(citizen_id, depth)
         
-        # Análisis de red
-        if network["connections"]:
-            criminal_count = sum(1 for c in network["connections"] if c.get("is_criminal"))
-            network["criminal_percentage"] = (criminal_count / len(network["connections"])) * 100
-            network["risk_analysis"] = self._analyze_network_risk(network["connections"])
+        # Análisis de red (una sola pasada sobre las conexiones)
+        criminal_count, total = self._count_criminals(network["connections"])
+        if total:
+            network["criminal_percentage"] = (criminal_count / total) * 100
+            network["risk_analysis"] = self._analyze_network_risk(criminal_count, total)
         else:
             network["criminal_percentage"] = 0
             network["risk_analysis"] = "Ciudadano aislado - Bajo riesgo de influencia"
@@ -115,24 +168,28 @@ class CitizenService:
         if not citizen:
             return None
         
-        # Normalizar edad
-        age = settings.CURRENT_YEAR - citizen.get("born", settings.CURRENT_YEAR)
-        age_normalized = min(age / 100.0, 1.0)
-        
-        # One-hot encoding del trabajo (mock simplificado)
-        job_vector = self._encode_job(citizen.get("job"))
-        
-        return CitizenFeatureVector(
-            id=citizen["id"],
-            name=citizen["name"],
-            status=citizen.get("status", "ACTIVE"),
-            born=citizen.get("born"),
-            job=citizen.get("job"),
-            criminal_degree=citizen.get("criminal_degree", 0),
-            risk_seed=citizen.get("risk_seed", 0.0),
-            social_network_size=citizen.get("social_network_size", 0),
-            job_vector=job_vector,
-            age_normalized=age_normalized
+        return self._build_feature_vectors([citizen])[0]
+
+    async def enrich_citizens_for_inference_batch(
+        self,
+        citizen_ids: List[int]
+    ) -> List[CitizenFeatureVector]:
+        """
+        Versión por lotes de enrich_citizen_for_inference.
+        Una sola consulta UNWIND para todos los IDs.
+        
+        Args:
+            citizen_ids: IDs de los ciudadanos
+            
+        Returns:
+            Vectores de características en el orden de citizen_ids
+            (los IDs inexistentes se omiten)
+        """
+        citizens = await citizen_repository.find_by_ids(citizen_ids)
+        by_id = {c["id"]: c for c in citizens}
+        
+        return self._build_feature_vectors(
+            [by_id[cid] for cid in citizen_ids if cid in by_id]
         )
 
     async def create_citizen(self, citizen_data: CitizenCreate) -> Dict[str, Any]:
@@ -149,6 +206,7 @@ class CitizenService:
         
         citizen_dict = citizen_data.model_dump()
         new_citizen = await citizen_repository.create(citizen_dict)
+        stats_cache.clear()
         
         logger.info(f"✅ Nuevo ciudadano creado: {new_citizen.get('name')} (#{new_citizen.get('id')})")
         return new_citizen
@@ -185,66 +243,88 @@ class CitizenService:
             raise ValueError("Risk value debe estar entre 0.0 y 1.0")
         
         success = await citizen_repository.update_risk_seed(citizen_id, risk_value)
+        stats_cache.clear()
         
         if success:
             logger.warning(f"Risk seed actualizado: Ciudadano #{citizen_id} → {risk_value}")
         
         return success
 
-    async def get_system_statistics(self) -> Dict[str, Any]:
-        """Obtiene estadísticas del sistema."""
-        total = await citizen_repository.count_all()
-        stats = await citizen_repository.get_statistics()
+    @stats_cache.cached
+    async def get_system_statistics(self) -> Mapping[str, Any]:
+        """Obtiene estadísticas del sistema (cacheadas durante STATS_CACHE_TTL_SECONDS, solo lectura)."""
+        total, stats = await asyncio.gather(
+            citizen_repository.count_all(),
+            citizen_repository.get_statistics()
+        )
         
-        return {
+        return MappingProxyType({
             "total_citizens": total,
             "average_risk": stats.get("average_risk", 0),
             "total_relationships": stats.get("total_relationships", 0),
             "timestamp": "now"
-        }
+        })
 
     # ==================== MÉTODOS AUXILIARES PRIVADOS ====================
 
     @staticmethod
-    def _encode_job(job: Optional[str]) -> List[float]:
-        """One-hot encoding de trabajos."""
-        jobs = [
-            "Doctor", "Engineer", "Teacher", "Police", "Artist",
-            "Driver", "Clerk", "Manager", "Scientist", "Other"
+    def _build_feature_vectors(
+        citizens: List[Dict[str, Any]]
+    ) -> List[CitizenFeatureVector]:
+        """
+        Construye los CitizenFeatureVector a partir de perfiles del repositorio.
+        La edad normalizada se calcula en bloque (kernel Numba en
+        app.core.features); el one-hot de trabajo es una fila compartida de
+        solo lectura de la tabla precalculada (sin copia por ciudadano).
+        """
+        if not citizens:
+            return []
+        
+        ages, _ = build_feature_arrays(citizens, settings.CURRENT_YEAR)
+        
+        return [
+            CitizenFeatureVector(
+                id=citizen["id"],
+                name=citizen["name"],
+                status=citizen.get("status", "ACTIVE"),
+                born=citizen.get("born"),
+                job=citizen.get("job"),
+                criminal_degree=citizen.get("criminal_degree", 0),
+                risk_seed=citizen.get("risk_seed", 0.0),
+                social_network_size=citizen.get("social_network_size", 0),
+                job_vector=encode_job(citizen.get("job")),
+                age_normalized=float(age)
+            )
+            for citizen, age in zip(citizens, ages.tolist())
         ]
+
+    @staticmethod
+    def _enrich_citizens(citizens: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Añade is_high_risk y status_summary a cada ciudadano (en el sitio)."""
+        watchlist_threshold = settings.RISK_THRESHOLD_WATCHLIST
+        summaries = _STATUS_SUMMARIES
         
-        if not job:
-            return [0.0] * len(jobs)
-        
-        try:
-            idx = jobs.index(job)
-            vector = [0.0] * len(jobs)
-            vector[idx] = 1.0
-            return vector
-        except ValueError:
-            vector = [0.0] * len(jobs)
-            vector[-1] = 1.0  # "Other"
-            return vector
+        for citizen in citizens:
+            citizen["is_high_risk"] = (citizen.get("risk_seed") or 0) >= watchlist_threshold
+            citizen["status_summary"] = summaries.get(citizen.get("status"), "Estado desconocido")
+        
+        return citizens
 
     @staticmethod
-    def _get_status_summary(status: str) -> str:
-        """Traduce código de estado a descripción legible."""
-        summaries = {
-            "ACTIVE": "Ciudadano activo - Bajo perfil",
-            "WATCHLIST": "En lista de vigilancia - Monitoreo activo",
-            "DETAINED": "Detenido - Bajo custodia",
-            "CLEARED": "Absuelto - Registro limpio"
-        }
-        return summaries.get(status, "Estado desconocido")
+    def _count_criminals(connections: List[Dict]) -> Tuple[int, int]:
+        """Cuenta conexiones criminales y totales en una sola pasada."""
+        criminal_count = 0
+        for connection in connections:
+            if connection.get("is_criminal"):
+                criminal_count += 1
+        return criminal_count, len(connections)
 
     @staticmethod
-    def _analyze_network_risk(connections: List[Dict]) -> str:
-        """Analiza riesgo de la red social."""
-        if not connections:
+    def _analyze_network_risk(criminal_count: int, total: int) -> str:
+        """Analiza riesgo de la red social a partir de los conteos."""
+        if not total:
             return "Sin conexiones conocidas"
         
-        criminal_count = sum(1 for c in connections if c.get("is_criminal"))
-        total = len(connections)
         percentage = (criminal_count / total) * 100
         
         if percentage >= 50:
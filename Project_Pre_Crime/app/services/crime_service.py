@@ -7,17 +7,33 @@ Responsabilidades:
   - Analizar patrones criminales
   - Validar datos antes de persistencia
 """
+import asyncio
+import bisect
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
-from app.repositories.crime_repo import CrimeRepository
+from app.core.cache import stats_cache
+from app.core.contracts import assert_projection_covers
+from app.core.ids import new_id
+from app.repositories.crime_repo import CRIME_PROJECTION, CrimeRepository
 from app.repositories.location_repo import LocationRepository
 from app.models.schemas_crime import CrimeCreate, Crime, CrimeReport, CrimeStatistics, CrimeTimeline
 
+# Factor de ubicación según crímenes históricos: <=5 → 1.0, 6-10 → 1.2, >10 → 1.5
+_LOC_FACTOR_THRESHOLDS = (6, 11)
+_LOC_FACTORS = (1.0, 1.2, 1.5)
+
+# Los listados usan model_construct: la proyección debe cubrir el esquema
+assert_projection_covers(Crime, CRIME_PROJECTION, "CRIME_PROJECTION")
+
 
 class CrimeService:
     """
     Servicio de lógica de negocio para Eventos Criminales.
     Implementa reglas de negocio, análisis y transformaciones de datos.
+    
+    Las filas leídas de Neo4j ya cumplen el esquema: los listados usan
+    model_construct (sin revalidar); la validación completa se reserva
+    para los datos que entran por HTTP.
     """
 
     @staticmethod
@@ -32,7 +48,7 @@ class CrimeService:
             Lista de crímenes con detalles enriquecidos
         """
         crimes_data = await CrimeRepository.find_all(limit)
-        return [Crime(**crime) for crime in crimes_data]
+        return [Crime.model_construct(**crime) for crime in crimes_data]
 
     @staticmethod
     async def get_crime(crime_id: str) -> Optional[Crime]:
@@ -63,7 +79,7 @@ class CrimeService:
             Lista de crímenes recientes
         """
         crimes_data = await CrimeRepository.find_recent_activity(days, limit)
-        return [Crime(**crime) for crime in crimes_data]
+        return [Crime.model_construct(**crime) for crime in crimes_data]
 
     @staticmethod
     async def get_crimes_by_type(crime_type: str, days: int = 90) -> List[Crime]:
@@ -78,7 +94,7 @@ class CrimeService:
             Lista de crímenes del tipo especificado
         """
         crimes_data = await CrimeRepository.find_by_type(crime_type, days)
-        return [Crime(**crime) for crime in crimes_data]
+        return [Crime.model_construct(**crime) for crime in crimes_data]
 
     @staticmethod
     async def get_crimes_at_location(location_id: str, limit: int = 50) -> List[Crime]:
@@ -93,7 +109,7 @@ class CrimeService:
             Historial criminal de la ubicación
         """
         crimes_data = await CrimeRepository.find_by_location(location_id, limit)
-        return [Crime(**crime) for crime in crimes_data]
+        return [Crime.model_construct(**crime) for crime in crimes_data]
 
     @staticmethod
     async def get_perpetrator_history(perpetrator_id: int, limit: int = 50) -> List[Crime]:
@@ -108,7 +124,7 @@ class CrimeService:
             Historial criminal del ciudadano
         """
         crimes_data = await CrimeRepository.find_by_perpetrator(perpetrator_id, limit)
-        return [Crime(**crime) for crime in crimes_data]
+        return [Crime.model_construct(**crime) for crime in crimes_data]
 
     @staticmethod
     async def report_crime(crime_create: CrimeCreate) -> CrimeReport:
@@ -121,10 +137,8 @@ class CrimeService:
         Returns:
             Reporte del crimen registrado con análisis
         """
-        import uuid
-        
         crime_data = {
-            "id": f"crime_{uuid.uuid4().hex[:8]}",
+            "id": new_id("crime"),
             "date": crime_create.date,
             "crime_type": crime_create.crime_type,
             "severity": crime_create.severity,
@@ -136,25 +150,28 @@ class CrimeService:
         # Registrar en base de datos
         crime_result = await CrimeRepository.create(crime_data)
         crime = Crime(**crime_result)
+        stats_cache.clear()
         
-        # Calcular impacto en riesgo local
-        location = await LocationRepository.find_by_id(crime_create.location_id)
+        # Ubicación (impacto en riesgo local) y ciudadanos relacionados en paralelo
+        location, related_count = await asyncio.gather(
+            LocationRepository.find_by_id(crime_create.location_id),
+            CrimeRepository.count_related_citizens(crime_result["id"])
+        )
         risk_impact = CrimeService._calculate_risk_impact(crime_create.severity, location)
         
-        # Obtener ciudadanos relacionados
-        related = await CrimeRepository.find_related_citizens(crime_result["id"])
-        
         return CrimeReport(
             crime=crime,
             risk_impact=risk_impact,
-            related_citizens_count=len([c for c in related.values() if c]) if related else 0,
+            related_citizens_count=related_count,
             investigation_status="OPEN"
         )
 
     @staticmethod
+    @stats_cache.cached
     async def get_crime_statistics(days: int = 365) -> CrimeStatistics:
         """
         Obtiene estadísticas agregadas de crímenes.
+        Cacheado durante STATS_CACHE_TTL_SECONDS.
         
         Args:
             days: Período de análisis
@@ -162,8 +179,10 @@ class CrimeService:
         Returns:
             Estadísticas completas de crímenes
         """
-        stats = await CrimeRepository.get_statistics(days)
-        crime_counts = await CrimeRepository.count_by_type()
+        stats, crime_counts = await asyncio.gather(
+            CrimeRepository.get_statistics(days),
+            CrimeRepository.count_by_type()
+        )
         
         return CrimeStatistics(
             total_crimes=stats.get("total_crimes", 0),
@@ -232,14 +251,9 @@ class CrimeService:
         # Score base de severidad normalizado
         severity_score = severity / 10.0  # [0.0-1.0]
         
-        # Factor de ubicación (más riesgo si ya hay antecedentes)
-        location_factor = 1.0
-        if location:
-            crime_count = location.get("historical_crime_count", 0)
-            if crime_count > 10:
-                location_factor = 1.5  # Amplificar riesgo en hotspots
-            elif crime_count > 5:
-                location_factor = 1.2
+        # Factor de ubicación (más riesgo si ya hay antecedentes; hotspots x1.5)
+        crime_count = location.get("historical_crime_count", 0) if location else 0
+        location_factor = _LOC_FACTORS[bisect.bisect_right(_LOC_FACTOR_THRESHOLDS, crime_count)]
         
         # Impacto final normalizado
         risk_impact = min(1.0, severity_score * location_factor)
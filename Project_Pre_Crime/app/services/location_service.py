@@ -7,44 +7,64 @@ Responsabilidades:
   - Validar datos antes de persistencia
   - Orquestar operaciones complejas
 """
-from typing import List, Optional, Dict, Any
-from app.repositories.location_repo import LocationRepository
+import asyncio
+import bisect
+import numpy as np
+from types import MappingProxyType
+from typing import List, Optional, Dict, Any, AsyncIterator, Mapping, Tuple
+from app.core.cache import stats_cache
+from app.core.contracts import assert_projection_covers
+from app.core.ids import new_id
+from app.core.scoring import score_locations
+from app.repositories.location_repo import ALL_LOCATIONS_QUERY, LocationRepository
 from app.repositories.crime_repo import CrimeRepository
 from app.models.schemas_location import LocationCreate, Location, LocationHotspot
 
+# Umbrales de score (ordenados) y nivel de riesgo para cada tramo
+_RISK_THRESHOLDS = (5, 10, 15)
+_RISK_LABELS = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+_RISK_THRESHOLDS_ARRAY = np.array(_RISK_THRESHOLDS, dtype=np.float64)
+_RISK_LABELS_ARRAY = np.array(_RISK_LABELS, dtype=object)
+
+# Ubicaciones por página al puntuar el listado en streaming
+LOCATION_PAGE_ROWS = 500
+
+# El listado usa model_construct: la proyección debe cubrir el esquema
+assert_projection_covers(Location, ALL_LOCATIONS_QUERY, "ALL_LOCATIONS_QUERY")
+
 
 class LocationService:
     """
     Servicio de lógica de negocio para Ubicaciones.
     Implementa reglas de negocio y transformaciones de datos.
+    
+    Las lecturas de Neo4j se construyen con model_construct (sin revalidar);
+    create_location mantiene la validación completa.
     """
 
     @staticmethod
-    async def get_all_locations() -> List[Location]:
+    async def iter_all_locations() -> AsyncIterator[Location]:
         """
-        Obtiene todas las ubicaciones de la ciudad.
+        Produce las ubicaciones enriquecidas según llegan de Neo4j.
+        Se agrupan en páginas de LOCATION_PAGE_ROWS y cada página se puntúa
+        en una sola pasada vectorizada; la lista completa nunca se bufferiza.
         
-        Returns:
-            Lista de ubicaciones con estadísticas enriquecidas
+        Yields:
+            Ubicaciones con estadísticas enriquecidas
         """
-        locations_data = await LocationRepository.find_all()
-        locations = []
+        recent_counts = await LocationRepository.count_recent_crimes_by_location(days=30)
         
-        for loc_data in locations_data:
-            # Enriquecer con crímenes recientes
-            recent_crimes = await LocationRepository.find_nearby_crimes(loc_data["id"], days=30)
-            loc_data["recent_crime_count"] = len(recent_crimes)
-            
-            # Calcular nivel de riesgo
-            loc_data["risk_level"] = LocationService._calculate_risk_level(
-                loc_data["historical_crime_count"],
-                loc_data["recent_crime_count"],
-                loc_data["env_risk"]
-            )
-            
-            locations.append(Location(**loc_data))
+        page = []
+        async for loc_data in LocationRepository.stream_all():
+            loc_data["recent_crime_count"] = recent_counts.get(loc_data["id"], 0)
+            page.append(loc_data)
+            if len(page) >= LOCATION_PAGE_ROWS:
+                for location in LocationService._enrich_page(page):
+                    yield location
+                page = []
         
-        return locations
+        for location in LocationService._enrich_page(page):
+            yield location
 
     @staticmethod
     async def get_location(location_id: str) -> Optional[Location]:
@@ -57,22 +77,15 @@ class LocationService:
         Returns:
             Ubicación enriquecida, o None si no existe
         """
-        loc_data = await LocationRepository.find_by_id(location_id)
+        # Ambas consultas solo dependen del ID: se lanzan en paralelo
+        loc_data, recent_crimes = await asyncio.gather(
+            LocationRepository.find_by_id(location_id),
+            LocationRepository.find_nearby_crimes(location_id, days=30)
+        )
         if not loc_data:
             return None
         
-        # Enriquecer con datos de crímenes recientes
-        recent_crimes = await LocationRepository.find_nearby_crimes(location_id, days=30)
-        loc_data["recent_crime_count"] = len(recent_crimes)
-        
-        # Calcular riesgo
-        loc_data["risk_level"] = LocationService._calculate_risk_level(
-            loc_data["historical_crime_count"],
-            loc_data["recent_crime_count"],
-            loc_data["env_risk"]
-        )
-        
-        return Location(**loc_data)
+        return LocationService._enrich_location(loc_data, len(recent_crimes))
 
     @staticmethod
     async def search_locations(name: str) -> Optional[Location]:
@@ -89,38 +102,41 @@ class LocationService:
         if not loc_data:
             return None
         
+        # El ID sale de la búsqueda: aquí la segunda consulta no puede adelantarse
         recent_crimes = await LocationRepository.find_nearby_crimes(loc_data["id"], days=30)
-        loc_data["recent_crime_count"] = len(recent_crimes)
-        loc_data["risk_level"] = LocationService._calculate_risk_level(
-            loc_data["historical_crime_count"],
-            loc_data["recent_crime_count"],
-            loc_data["env_risk"]
-        )
-        
-        return Location(**loc_data)
+        return LocationService._enrich_location(loc_data, len(recent_crimes))
 
     @staticmethod
-    async def get_hotspots(limit: int = 10) -> List[LocationHotspot]:
+    @stats_cache.cached
+    async def get_hotspots(limit: int = 10) -> Tuple[LocationHotspot, ...]:
         """
         Obtiene las ubicaciones de mayor riesgo criminal.
+        Cacheado durante STATS_CACHE_TTL_SECONDS.
         
         Args:
             limit: Número máximo de hotspots
             
         Returns:
-            Lista de hotspots ordenados por riesgo
+            Hotspots ordenados por riesgo (tupla inmutable: se cachea)
         """
         hotspots_data = await LocationRepository.find_hotspots(limit)
-        hotspots = []
+        if not hotspots_data:
+            return ()
         
-        for hotspot in hotspots_data:
-            # Asegurar que risk_score está normalizado
-            if not 0.0 <= hotspot.get("risk_score", 0) <= 1.0:
-                hotspot["risk_score"] = min(1.0, max(0.0, hotspot.get("risk_score", 0.5) / 100))
-            
-            hotspots.append(LocationHotspot(**hotspot))
+        # Asegurar que risk_score está normalizado: los valores fuera de [0, 1]
+        # vienen en escala 0-100 y se reescalan y recortan de una vez
+        scores = np.fromiter(
+            (hotspot.get("risk_score") or 0.0 for hotspot in hotspots_data),
+            dtype=np.float64,
+            count=len(hotspots_data)
+        )
+        out_of_range = np.flatnonzero((scores < 0.0) | (scores > 1.0))
+        if out_of_range.size:
+            rescaled = np.clip(scores[out_of_range] / 100, 0.0, 1.0)
+            for i, score in zip(out_of_range.tolist(), rescaled.tolist()):
+                hotspots_data[i]["risk_score"] = score
         
-        return hotspots
+        return tuple(LocationHotspot(**hotspot) for hotspot in hotspots_data)
 
     @staticmethod
     async def get_location_crimes(location_id: str, days: int = 30) -> List[Dict[str, Any]]:
@@ -147,10 +163,8 @@ class LocationService:
         Returns:
             Ubicación creada
         """
-        import uuid
-        
         location_data = {
-            "id": f"loc_{uuid.uuid4().hex[:8]}",
+            "id": new_id("loc"),
             "name": location_create.name,
             "location_type": location_create.location_type,
             "env_risk": location_create.env_risk,
@@ -159,32 +173,94 @@ class LocationService:
         }
         
         loc_data = await LocationRepository.create(location_data)
+        stats_cache.clear()
         return Location(
             **loc_data,
             risk_level=LocationService._calculate_risk_level(0, 0, location_create.env_risk)
         )
 
     @staticmethod
-    async def get_statistics() -> Dict[str, Any]:
+    @stats_cache.cached
+    async def get_statistics() -> Mapping[str, Any]:
         """
         Obtiene estadísticas globales de ubicaciones.
+        Cacheado durante STATS_CACHE_TTL_SECONDS.
         
         Returns:
-            Diccionario con estadísticas agregadas
+            Estadísticas agregadas (vista de solo lectura: se cachea)
         """
-        stats = await LocationRepository.get_statistics()
+        # Consultas independientes: se lanzan en paralelo
+        stats, hotspots, crime_types = await asyncio.gather(
+            LocationRepository.get_statistics(),
+            LocationRepository.find_hotspots(limit=1),
+            CrimeRepository.count_by_type()
+        )
         
         # Enriquecer con información de hotspots
-        hotspots = await LocationRepository.find_hotspots(limit=1)
         if hotspots:
             stats["highest_risk_location"] = hotspots[0]["name"]
         
-        # Obtener tipos de crímenes más comunes
-        crime_types = await CrimeRepository.count_by_type()
+        # Tipo de crimen más común
         if crime_types:
             stats["top_crime_type"] = max(crime_types.items(), key=lambda x: x[1])[0]
         
-        return stats
+        return MappingProxyType(stats)
+
+    @staticmethod
+    def _enrich_location(loc_data: Dict[str, Any], recent_count: int) -> Location:
+        """
+        Completa una ubicación con sus crímenes recientes y su nivel de riesgo.
+        
+        Args:
+            loc_data: Ubicación tal como la devuelve el repositorio
+            recent_count: Número de crímenes recientes (30 días)
+            
+        Returns:
+            Ubicación enriquecida
+        """
+        loc_data["recent_crime_count"] = recent_count
+        loc_data["risk_level"] = LocationService._calculate_risk_level(
+            loc_data["historical_crime_count"],
+            recent_count,
+            loc_data["env_risk"]
+        )
+        return Location.model_construct(**loc_data)
+
+    @staticmethod
+    def _enrich_page(page: List[Dict[str, Any]]) -> List[Location]:
+        """
+        Completa una página de ubicaciones (ya con recent_crime_count) con su
+        nivel de riesgo, calculado para toda la página de una vez.
+        """
+        if not page:
+            return []
+        risk_levels = LocationService._calculate_risk_levels(page)
+        locations = []
+        for loc_data, risk_level in zip(page, risk_levels):
+            loc_data["risk_level"] = risk_level
+            locations.append(Location.model_construct(**loc_data))
+        return locations
+
+    @staticmethod
+    def _calculate_risk_levels(locations_data: List[Dict[str, Any]]) -> List[str]:
+        """
+        Versión vectorizada de _calculate_risk_level para un lote de ubicaciones.
+        
+        Args:
+            locations_data: Ubicaciones con historical_crime_count,
+                recent_crime_count y env_risk
+            
+        Returns:
+            Nivel de riesgo de cada ubicación, en el mismo orden
+        """
+        n = len(locations_data)
+        historical = np.fromiter((l["historical_crime_count"] for l in locations_data), dtype=np.float64, count=n)
+        recent = np.fromiter((l["recent_crime_count"] for l in locations_data), dtype=np.float64, count=n)
+        env_risk = np.fromiter((l["env_risk"] for l in locations_data), dtype=np.float64, count=n)
+        
+        # Mismo score ponderado que _calculate_risk_level (kernel Numba si está disponible)
+        _, idx = score_locations(historical, recent, env_risk, _RISK_THRESHOLDS_ARRAY)
+        return _RISK_LABELS_ARRAY[idx].tolist()
 
     @staticmethod
     def _calculate_risk_level(crime_count: int, recent_count: int, env_risk: float) -> str:
@@ -202,11 +278,4 @@ class LocationService:
         # Score ponderado: 60% histórico, 30% reciente, 10% ambiental
         score = (crime_count * 0.6) + (recent_count * 0.3) + (env_risk * 10 * 0.1)
         
-        if score >= 15:
-            return "CRITICAL"
-        elif score >= 10:
-            return "HIGH"
-        elif score >= 5:
-            return "MEDIUM"
-        else:
-            return "LOW"
+        return _RISK_LABELS[bisect.bisect_right(_RISK_THRESHOLDS, score)]
@@ -0,0 +1,140 @@
+"""
+PredictionRecorder: Registro asíncrono de predicciones en lotes.
+Las predicciones se encolan en memoria y una tarea en segundo plano
+las persiste con una única escritura UNWIND por lote.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from app.repositories.prediction_repo import prediction_repository
+from app.config import settings
+
+logger = logging.getLogger("PredictionRecorder")
+
+class PredictionRecorder:
+    """
+    Cola de escritura para RED_BALL_PREDICTED.
+    
+    - Agrupa hasta batch_size predicciones o espera flush_interval segundos
+    - Si la cola se llena (o el consumidor no está activo) escribe
+      directamente, sin perder predicciones
+    - Al detenerse vacía la cola antes de terminar
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 32,
+        flush_interval: float = 0.05,
+        max_queue_size: int = 10_000
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        """True si el consumidor en segundo plano está activo."""
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Arranca el consumidor (llamar dentro del event loop, en el startup)."""
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._task = asyncio.create_task(self._run())
+        logger.info("📝 Registro de predicciones en segundo plano activo")
+
+    async def stop(self):
+        """Vacía la cola pendiente y detiene el consumidor."""
+        if not self.running:
+            return
+        await self._queue.put(None)  # Centinela de parada
+        await self._task
+        self._task = None
+        logger.info("📝 Registro de predicciones detenido")
+
+    async def record(self, prediction: Dict[str, Any]):
+        """
+        Encola una predicción {cid, prob, conf, verdict}.
+        
+        Args:
+            prediction: Fila de predicción a persistir
+        """
+        await self.record_many([prediction])
+
+    async def record_many(self, predictions: List[Dict[str, Any]]):
+        """
+        Encola varias predicciones.
+        Lo que no cabe en la cola se escribe directamente (circuit breaker).
+        
+        Args:
+            predictions: Filas de predicción a persistir
+        """
+        if not self.running:
+            await prediction_repository.record_predictions(predictions)
+            return
+        
+        overflow = []
+        for prediction in predictions:
+            try:
+                self._queue.put_nowait(prediction)
+            except asyncio.QueueFull:
+                overflow.append(prediction)
+        
+        if overflow:
+            logger.warning("⚠️ Cola de predicciones llena, escritura directa de %d filas", len(overflow))
+            await prediction_repository.record_predictions(overflow)
+
+    async def _run(self):
+        """Consumidor: agrupa filas por tamaño o por tiempo y las persiste."""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+            
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            await self._flush(batch)
+        
+        # Vaciar lo que quede tras el centinela
+        remaining = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None:
+                remaining.append(item)
+        for i in range(0, len(remaining), self.batch_size):
+            await self._flush(remaining[i:i + self.batch_size])
+
+    @staticmethod
+    async def _flush(batch: List[Dict[str, Any]]):
+        """Persiste un lote; los errores se registran sin detener el consumidor."""
+        try:
+            await prediction_repository.record_predictions(batch)
+        except Exception as e:
+            logger.error("❌ Error registrando %d predicciones: %s", len(batch), e)
+
+# Instancia Singleton
+prediction_recorder = PredictionRecorder(
+    batch_size=settings.PREDICTION_WRITE_BATCH_SIZE,
+    flush_interval=settings.PREDICTION_WRITE_INTERVAL_SECONDS,
+    max_queue_size=settings.PREDICTION_WRITE_QUEUE_SIZE
+)
@@ -3,15 +3,26 @@ PredictionService: Servicios de negocio para predicciones.
 Orquesta el flujo de inferencia y persistencia.
 """
 import logging
-from typing import Dict, Any, Optional
+import numpy as np
+from bisect import bisect_right
+from typing import Dict, Any, List, Optional, Tuple
 from app.repositories.prediction_repo import prediction_repository
+from app.services.prediction_recorder import prediction_recorder
 from app.core.ai_engine import precog_system
+from app.core.responses import weak_etag
 from app.models.schemas import CitizenFeatureVector, PredictionOutput, VerdictType
 from app.config import settings
-from datetime import datetime
+from datetime import datetime, timezone
 
 logger = logging.getLogger("PredictionService")
 
+# Veredictos indexados por número de umbrales superados (0, 1, 2)
+_VERDICTS = (VerdictType.SAFE, VerdictType.WATCHLIST, VerdictType.INTERVENE)
+_VERDICT_THRESHOLDS = (settings.RISK_THRESHOLD_WATCHLIST, settings.RISK_THRESHOLD_INTERVENE)
+
+# Zona horaria resuelta una sola vez para los timestamps de análisis
+_UTC = timezone.utc
+
 class PredictionService:
     """
     Servicios de negocio para predicciones Pre-Crime.
@@ -32,7 +43,7 @@ class PredictionService:
         
         1. Ejecutar modelo de IA
         2. Determinar veredicto según umbral
-        3. Registrar en BD
+        3. Encolar registro en BD (escritura en lote en background)
         4. Retornar resultado
         
         Args:
@@ -49,18 +60,18 @@ class PredictionService:
         # 2. CLASSIFY: Determinar veredicto
         verdict = self._classify_verdict(probability)
         
-        # 3. RECORD: Persistir predicción (en background idealmente)
-        await prediction_repository.record_prediction(
-            citizen_id=citizen_features.id,
-            probability=probability,
-            confidence=confidence,
-            verdict=verdict.value
-        )
+        # 3. RECORD: Encolar predicción (se persiste en lote en background)
+        await prediction_recorder.record({
+            "cid": citizen_features.id,
+            "prob": probability,
+            "conf": confidence,
+            "verdict": verdict.value
+        })
         
         # 4. LOG: Registrar en logs
         logger.info(
-            f"🔮 Predicción completada: #{citizen_features.id} ({citizen_features.name}) "
-            f"→ {verdict.value} ({probability:.1%})"
+            "🔮 Predicción completada: #%d (%s) → %s (%.1f%%)",
+            citizen_features.id, citizen_features.name, verdict.value, probability * 100
         )
         
         # 5. RETURN
@@ -70,14 +81,65 @@ class PredictionService:
             probability=probability,
             verdict=verdict,
             confidence=confidence,
-            analyzed_at=datetime.now()
+            analyzed_at=datetime.now(_UTC)
         )
 
+    async def predict_batch(
+        self,
+        citizens_features: List[CitizenFeatureVector]
+    ) -> List[PredictionOutput]:
+        """
+        Pipeline de predicción para un lote de ciudadanos.
+        
+        Misma inferencia y clasificación que predict_citizen_risk; las
+        predicciones se encolan juntas para su escritura en lote.
+        
+        Args:
+            citizens_features: Vectores de características enriquecidos
+            
+        Returns:
+            Lista de PredictionOutput en el mismo orden
+        """
+        outputs = []
+        records = []
+        
+        # Método ligado a local y timestamp capturados una sola vez para todo el lote
+        classify = self._classify_verdict
+        analyzed_at = datetime.now(_UTC)
+        
+        # Una sola pasada del modelo para todo el lote
+        ai_verdicts = precog_system.predict_many(citizens_features)
+        
+        for citizen_features, ai_verdict in zip(citizens_features, ai_verdicts):
+            probability = ai_verdict["probability"]
+            confidence = ai_verdict["confidence"]
+            verdict = classify(probability)
+            
+            records.append({
+                "cid": citizen_features.id,
+                "prob": probability,
+                "conf": confidence,
+                "verdict": verdict.value
+            })
+            outputs.append(PredictionOutput(
+                subject_id=citizen_features.id,
+                subject_name=citizen_features.name,
+                probability=probability,
+                verdict=verdict,
+                confidence=confidence,
+                analyzed_at=analyzed_at
+            ))
+        
+        await prediction_recorder.record_many(records)
+        
+        logger.info("🔮 Lote completado: %d ciudadanos analizados", len(outputs))
+        return outputs
+
     async def get_prediction_history(
         self, 
         citizen_id: int,
         limit: int = 20
-    ) -> Dict[str, Any]:
+    ) -> Optional[Dict[str, Any]]:
         """
         Obtiene historial de predicciones para un ciudadano.
         
@@ -86,25 +148,36 @@ class PredictionService:
             limit: Máximo de registros
             
         Returns:
-            Historial con análisis
+            Historial con análisis, o None si el ciudadano no existe
         """
-        history = await prediction_repository.get_prediction_history(citizen_id, limit)
+        record = await prediction_repository.find_citizen_with_history(citizen_id, limit)
+        
+        if record is None:
+            return None
+        
+        citizen = record["citizen"]
+        history = record["history"]
         
         if not history:
             return {
                 "citizen_id": citizen_id,
+                "citizen_name": citizen.get("name"),
                 "total_predictions": 0,
                 "history": []
             }
         
-        # Calcular tendencia
-        avg_probability = sum(h.get("probability", 0) for h in history) / len(history)
+        # Calcular tendencia (una sola extracción de probabilidades)
+        probabilities = np.fromiter(
+            (h["probability"] for h in history), dtype=np.float64, count=len(history)
+        )
+        avg_probability, recent_avg, older_avg = self._trend_stats(probabilities)
         
         return {
             "citizen_id": citizen_id,
+            "citizen_name": citizen.get("name"),
             "total_predictions": len(history),
             "average_risk": round(avg_probability, 3),
-            "trend": self._calculate_trend(history),
+            "trend": self._calculate_trend(recent_avg, older_avg),
             "history": history
         }
 
@@ -121,7 +194,7 @@ class PredictionService:
         return {
             "total_interventions": len(interventions),
             "interventions": interventions,
-            "critical_count": sum(1 for i in interventions if i.get("probability", 0) > 0.9)
+            "critical_count": sum(1 for i in interventions if i["probability"] > 0.9)
         }
 
     async def mark_intervention_resolved(self, citizen_id: int) -> bool:
@@ -154,45 +227,79 @@ class PredictionService:
             "accuracy_metrics": accuracy
         }
 
+    async def get_dashboard_etag(self, *scope: Any) -> str:
+        """
+        ETag de los dashboards de administración.
+        Cambia cuando se registra o resuelve alguna predicción.
+        
+        Args:
+            scope: Partes adicionales de la clave (endpoint, parámetros)
+            
+        Returns:
+            ETag débil
+        """
+        stamp = await prediction_repository.get_version_stamp()
+        return weak_etag(*scope, stamp.get("last_predicted"), stamp.get("last_resolved"))
+
     # ==================== MÉTODOS AUXILIARES PRIVADOS ====================
 
     @staticmethod
-    def _classify_verdict(probability: float) -> VerdictType:
+    def _classify_verdict(
+        probability: float,
+        thresholds: Tuple[float, ...] = _VERDICT_THRESHOLDS
+    ) -> VerdictType:
         """
         Clasifica la probabilidad en veredicto.
+        Sin ramas: bisect_right cuenta los umbrales superados (>=), que
+        indexan la tabla de veredictos.
         
         Args:
             probability: Probabilidad predicha [0.0-1.0]
+            thresholds: Umbrales ordenados (por defecto WATCHLIST/INTERVENE de settings)
             
         Returns:
             VerdictType apropiado
         """
-        if probability >= settings.RISK_THRESHOLD_INTERVENE:
-            return VerdictType.INTERVENE
-        elif probability >= settings.RISK_THRESHOLD_WATCHLIST:
-            return VerdictType.WATCHLIST
-        else:
-            return VerdictType.SAFE
+        return _VERDICTS[bisect_right(thresholds, probability)]
 
     @staticmethod
-    def _calculate_trend(history: list) -> str:
+    def _trend_stats(probabilities: np.ndarray) -> Tuple[float, Optional[float], Optional[float]]:
+        """
+        Media global y medias de cada mitad del historial en una sola pasada.
+        
+        Args:
+            probabilities: Probabilidades del historial ordenadas por fecha
+            
+        Returns:
+            (media global, media reciente, media antigua); las dos últimas son
+            None con menos de 2 registros
+        """
+        # Comparar primeras 50% vs últimas 50%
+        n = len(probabilities)
+        mid = n // 2
+        recent_sum = float(probabilities[:mid].sum())
+        older_sum = float(probabilities[mid:].sum())
+        avg_all = (recent_sum + older_sum) / n
+        
+        if n < 2:
+            return avg_all, None, None
+        return avg_all, recent_sum / mid, older_sum / (n - mid)
+
+    @staticmethod
+    def _calculate_trend(recent_avg: Optional[float], older_avg: Optional[float]) -> str:
         """
         Calcula tendencia de riesgo en historial.
         
         Args:
-            history: Lista de predicciones ordenadas por fecha
+            recent_avg: Media de la mitad reciente (None si no hay datos suficientes)
+            older_avg: Media de la mitad antigua
             
         Returns:
             Descripción de tendencia
         """
-        if len(history) < 2:
+        if recent_avg is None or older_avg is None:
             return "Datos insuficientes"
         
-        # Comparar primeras 50% vs últimas 50%
-        mid = len(history) // 2
-        recent_avg = sum(h.get("probability", 0) for h in history[:mid]) / mid
-        older_avg = sum(h.get("probability", 0) for h in history[mid:]) / (len(history) - mid)
-        
         diff = recent_avg - older_avg
         
         if diff > 0.1:
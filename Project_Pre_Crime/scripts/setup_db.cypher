@@ -3,6 +3,11 @@
 CREATE CONSTRAINT citizen_id IF NOT EXISTS FOR (c:Citizen) REQUIRE c.id IS UNIQUE;
 CREATE CONSTRAINT location_id IF NOT EXISTS FOR (l:Location) REQUIRE l.id IS UNIQUE;
 CREATE CONSTRAINT crime_id IF NOT EXISTS FOR (e:Event) REQUIRE e.id IS UNIQUE;
+// Índice de rango para filtros por umbral de riesgo (/precogs/high-risk)
+CREATE RANGE INDEX citizen_risk_seed IF NOT EXISTS FOR (c:Citizen) ON (c.risk_seed);
+// Índices ordenados para el ETag de los dashboards (última predicción/resolución)
+CREATE RANGE INDEX prediction_timestamp IF NOT EXISTS FOR ()-[p:RED_BALL_PREDICTED]-() ON (p.timestamp);
+CREATE RANGE INDEX prediction_resolved_at IF NOT EXISTS FOR ()-[p:RED_BALL_PREDICTED]-() ON (p.resolved_at);
 
 // 2. Génesis de la Ciudad (Creación de Nodos)
 // Crear Ciudadanos (Nodos Azules)
@@ -7,14 +7,24 @@ relaciones sociales y crímenes históricos para entrenar el sistema Pre-Crime.
 Inspirado en Minority Report y basado en redes sociales realistas.
 """
 
+import asyncio
 import random
 import time
 from datetime import datetime, timedelta
-from neo4j import GraphDatabase
+import numpy as np
+import pandas as pd
+from neo4j import AsyncGraphDatabase
+from neo4j.exceptions import ClientError
 from faker import Faker
 from tqdm import tqdm
 import logging
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 # --- CONFIGURACIÓN ---
@@ -23,106 +33,264 @@ AUTH = ("neo4j", "password")
 NUM_CITIZENS = 1000
 NUM_LOCATIONS = 50
 CRIME_RATE = 0.05  # 5% de la población son criminales activos
+SOCIAL_CANDIDATES = 50  # Candidatos a amistad evaluados por ciudadano
+LINK_BLOCK_ROWS = 65536  # Ciudadanos por bloque en la versión NumPy (acota temporales)
+BORN_RANGE = (1970, 2025)  # Años de nacimiento (inclusive), dentro del rango del API
+SEED = None  # Fijar un entero para generar ciudades reproducibles
+
+# CRIMEN CONTEXTUAL: tipo de ubicación -> (tipo de crimen, severidad mín, máx)
+CRIME_PROFILES = {
+    "Bank": ("Robbery", 7, 10),
+    "Jewelry Store": ("Robbery", 6, 9),
+    "Dark Alley": ("Assault", 4, 8),
+    "Park": ("Vandalism", 2, 5),
+}
+LOCATION_TYPES = (
+    "Bank", "Jewelry Store", "Subway Station", "Dark Alley", 
+    "Park", "Cafe", "Apartment Block", "Shopping Mall", 
+    "Gas Station", "Warehouse"
+)
+
+# Riesgo ambiental por tipo de ubicación (resto: DEFAULT_ENV_RISK)
+ENV_RISK = {
+    # Los callejones y almacenes tienen un factor de riesgo ambiental más alto
+    "Dark Alley": 0.9,
+    "Warehouse": 0.9,
+    # Objetivos atractivos
+    "Bank": 0.7,
+    "Jewelry Store": 0.7,
+}
+DEFAULT_ENV_RISK = 0.1
+
+# Resto de ubicaciones: admiten cualquiera de estos tipos, severidad 3-7
+DEFAULT_CRIME_TYPES = ("Theft", "Assault", "Vandalism")
+DEFAULT_SEVERITY = (3, 7)
+# Distribución de tipos de crimen (se sortea el tipo y luego la ubicación)
+CRIME_TYPE_WEIGHTS = {
+    "Robbery": 0.3,
+    "Assault": 0.4,
+    "Vandalism": 0.2,
+    "Theft": 0.1,
+}
+CRIME_HISTORY_DAYS = 730  # Ventana del historial (últimos 2 años)
+
+# Tablas por tipo de ubicación (fila extra al final: tipo sin perfil o
+# desconocido), para resolver compatibilidad y severidad con indexado NumPy
+_CRIME_TYPES = tuple(CRIME_TYPE_WEIGHTS)
+_LOCATION_TYPE_INDEX = {t: i for i, t in enumerate(LOCATION_TYPES)}
+_OTHER_LOCATION = len(LOCATION_TYPES)
+_PROFILES = [CRIME_PROFILES.get(t) for t in LOCATION_TYPES] + [None]
+_SEV_LOW = np.array([p[1] if p else DEFAULT_SEVERITY[0] for p in _PROFILES], dtype=np.int64)
+_SEV_HIGH = np.array([p[2] if p else DEFAULT_SEVERITY[1] for p in _PROFILES], dtype=np.int64)
+_COMPATIBLE = np.array(
+    [[t in ((p[0],) if p else DEFAULT_CRIME_TYPES) for t in _CRIME_TYPES] for p in _PROFILES]
+)
+
+# Tamaño de lote por transacción: los nodos (CREATE / MERGE por clave única)
+# admiten lotes grandes; las relaciones (MATCH-MATCH-MERGE) retienen más locks
+NODE_BATCH_SIZE = 5000
+REL_BATCH_SIZE = 1000
+# Filas por commit: varias sentencias de un lote comparten transacción
+# (un fsync del log de transacciones por cada ~COMMIT_ROWS filas)
+COMMIT_ROWS = 10000
+
+# Lote de apoc.periodic.iterate (commit por lote en el servidor)
+ITERATE_BATCH_SIZE = 5000
+# Aristas :KNOWS por envío: la red se materializa como lista por bloques
+SOCIAL_STREAM_ROWS = 50000
+
+# Lotes en vuelo simultáneamente (cada uno en su propia conexión bolt)
+INSERT_CONCURRENCY = 8
+# Bloques generados por delante de la inserción (generación || commit)
+PIPELINE_DEPTH = 2
+MAX_CONNECTION_POOL_SIZE = 16
+# Segundos mínimos entre refrescos de las barras de progreso
+PROGRESS_MININTERVAL = 1.0
+
+# Sin ponderación por frecuencia: los providers eligen con choice uniforme,
+# mucho más barato que el muestreo ponderado por defecto
+fake = Faker(use_weighting=False)
+rng = np.random.default_rng(SEED)
+if SEED is not None:
+    random.seed(SEED)
+    Faker.seed(SEED)
+
+# Pool de profesiones: se muestrea del pool en lugar de invocar el provider
+# de Faker por ciudadano
+JOB_POOL_SIZE = 500
+
+
+# ====== KERNELS DE LA RED SOCIAL ======
+
+def _sample_links_numpy(ids, risks, n_samples, block_rows=LINK_BLOCK_ROWS):
+    """
+    Versión NumPy: probabilidades y Bernoulli sobre la matriz de candidatos,
+    por bloques de filas para que los temporales no crezcan con la población.
+    Devuelve (fila origen, fila destino), ordenado por origen.
+    """
+    n = ids.shape[0]
+    high_risk = risks > 0.6
+    src_parts, dst_parts = [], []
+
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        block_ids = ids[start:stop, None]
+
+        # Candidatos (índices en ids) para cada ciudadano del bloque
+        partners = rng.integers(0, n, size=(stop - start, n_samples), dtype=np.int32)
+        partner_ids = ids[partners]
+
+        # Probabilidad base de conexión
+        prob = np.full(partners.shape, 0.1, dtype=np.float32)
+
+        # Si ambos tienen alto riesgo, es muy probable que se conozcan (Cómplices)
+        prob[high_risk[start:stop, None] & high_risk[partners]] += 0.5  # HOMOFILIA PROGRAMADA
+
+        # Vecindario físico (IDs cercanos)
+        prob[np.abs(block_ids - partner_ids) < 20] += 0.2
+
+        # Bernoulli por par, descartando auto-conexiones
+        linked = (rng.random(partners.shape, dtype=np.float32) < prob) & (partner_ids != block_ids)
+        rows, cols = np.nonzero(linked)
+        src_parts.append((start + rows).astype(np.int32))
+        dst_parts.append(partners[rows, cols])
+
+    return np.concatenate(src_parts), np.concatenate(dst_parts)
 
-fake = Faker()
+
+if NUMBA_AVAILABLE:
+    _GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+
+    @njit(cache=True)
+    def _mix64(z):
+        """Finalizador de splitmix64: 64 bits bien mezclados a partir de un contador."""
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+    @njit(cache=True)
+    def _link_probability(id_a, id_b, risk_a, risk_b):
+        """Probabilidad de :KNOWS entre dos ciudadanos (homofilia + vecindario)."""
+        prob = 0.1
+        if risk_a > 0.6 and risk_b > 0.6:
+            prob += 0.5
+        if abs(id_a - id_b) < 20:
+            prob += 0.2
+        return prob
+
+    @njit(parallel=True, cache=True)
+    def _sample_links_parallel(ids, risks, n_samples, seed):
+        """
+        Kernel paralelo: cada ciudadano es independiente y escribe solo en su
+        fila de una matriz preasignada (índice del candidato o -1), sin
+        contador compartido entre hilos.
+
+        Los números aleatorios salen de un splitmix64 por fila derivado de
+        (seed, i): el resultado no depende del reparto entre hilos, así que
+        con SEED fijo la red es reproducible también en paralelo.
+        """
+        n = ids.shape[0]
+        n_u = np.uint64(n)
+        links = np.full((n, n_samples), -1, np.int32)
+        for i in prange(n):
+            state = _mix64(seed + np.uint64(i) * _GOLDEN_GAMMA)
+            for k in range(n_samples):
+                state += _GOLDEN_GAMMA
+                j = np.int64(_mix64(state) % n_u)
+                if ids[i] == ids[j]:
+                    continue
+
+                state += _GOLDEN_GAMMA
+                u = np.float64(_mix64(state) >> np.uint64(11)) * (1.0 / 9007199254740992.0)
+                if u < _link_probability(ids[i], ids[j], risks[i], risks[j]):
+                    links[i, k] = j
+        return links
 
 
 class PreCrimeCityGenerator:
     """Generador de ciudad sintética para Project Pre-Crime"""
     
     def __init__(self, uri=URI, auth=AUTH, num_citizens=NUM_CITIZENS, num_locations=NUM_LOCATIONS):
-        self.driver = GraphDatabase.driver(uri, auth=auth)
+        self.driver = AsyncGraphDatabase.driver(
+            uri, auth=auth, max_connection_pool_size=MAX_CONNECTION_POOL_SIZE
+        )
         self.num_citizens = num_citizens
         self.num_locations = num_locations
+        # Lo generado en esta ejecución se conserva en memoria para las fases
+        # siguientes (evita releerlo de Neo4j)
+        # Ciudadanos como arrays paralelos (id, risk_seed): es todo lo que
+        # usan las fases de relaciones
+        self._citizen_ids = None
+        self._citizen_risks = None
+        self._locations = None
+        # Límite global de escrituras en vuelo, compartido por todas las fases
+        # (un semáforo por llamada lo multiplicaría al solaparlas)
+        self._write_slots = asyncio.Semaphore(INSERT_CONCURRENCY)
+        # Tras clear_database no hay nada que fusionar: CREATE en lugar de MERGE
+        self._fresh = False
         logger.info(f"Conexión establecida a Neo4j: {uri}")
     
-    def close(self):
+    async def close(self):
         """Cerrar conexión a Neo4j"""
-        self.driver.close()
+        await self.driver.close()
         logger.info("Conexión cerrada")
 
-    def clear_database(self):
+    async def clear_database(self):
         """Limpia la base de datos para empezar de cero."""
         print("🧹 Limpiando la ciudad (Base de datos)...")
-        with self.driver.session() as session:
-            session.run("MATCH (n) DETACH DELETE n")
+        async with self.driver.session() as session:
+            result = await session.run("MATCH (n) DETACH DELETE n")
+            await result.consume()
+        self._fresh = True
         logger.info("Base de datos limpiada")
 
-    def create_constraints(self):
+    async def create_constraints(self):
         """Crea índices para que la inserción sea rápida."""
         print("🛡️ Estableciendo leyes físicas (Indices)...")
         queries = [
             "CREATE CONSTRAINT citizen_id IF NOT EXISTS FOR (c:Citizen) REQUIRE c.id IS UNIQUE",
             "CREATE CONSTRAINT location_id IF NOT EXISTS FOR (l:Location) REQUIRE l.id IS UNIQUE",
-            "CREATE INDEX risk_index IF NOT EXISTS FOR (c:Citizen) ON (c.risk_seed)"
+            "CREATE RANGE INDEX citizen_risk_seed IF NOT EXISTS FOR (c:Citizen) ON (c.risk_seed)"
         ]
-        with self.driver.session() as session:
+        async with self.driver.session() as session:
             for q in queries:
                 try:
-                    session.run(q)
+                    result = await session.run(q)
+                    await result.consume()
                 except Exception as e:
                     logger.warning(f"Constraint ya existe o error: {e}")
         logger.info("Constraints e índices creados")
 
-    def generate_locations(self):
+    async def generate_locations(self):
         """Genera el escenario (Bancos, Callejones, Parques)."""
         print(f"🏢 Construyendo {self.num_locations} ubicaciones...")
-        loc_types = [
-            "Bank", "Jewelry Store", "Subway Station", "Dark Alley", 
-            "Park", "Cafe", "Apartment Block", "Shopping Mall", 
-            "Gas Station", "Warehouse"
-        ]
-        
-        locations = []
-        for i in range(self.num_locations):
-            l_type = random.choice(loc_types)
-            # Los callejones y almacenes tienen un factor de riesgo ambiental más alto
-            if l_type in ["Dark Alley", "Warehouse"]:
-                env_risk = 0.9
-            elif l_type in ["Bank", "Jewelry Store"]:
-                env_risk = 0.7  # Objetivos atractivos
-            else:
-                env_risk = 0.1
-            
-            locations.append({
-                "id": f"LOC_{i}",
-                "name": f"{fake.street_name()} {l_type}",
-                "type": l_type,
-                "env_risk": env_risk,
-                "coord_x": fake.latitude(),
-                "coord_y": fake.longitude()
-            })
-
-        query = """
+        # Con la base recién limpiada CREATE evita la búsqueda y el lock del MERGE
+        write = "CREATE" if self._fresh else "MERGE"
+        query = f"""
         UNWIND $batch as row
-        MERGE (l:Location {id: row.id})
+        {write} (l:Location {{id: row.id}})
         SET l.name = row.name, l.type = row.type, 
             l.env_risk = row.env_risk, 
-            l.coord = point({latitude: toFloat(row.coord_x), longitude: toFloat(row.coord_y)})
+            l.coord = point({{latitude: toFloat(row.coord_x), longitude: toFloat(row.coord_y)}})
         """
-        self._batch_insert(query, locations)
+        locations = []
+
+        def build_chunk(start, stop):
+            chunk = self._build_locations(start, stop)
+            locations.extend(chunk)
+            return chunk
+
+        await self._pipelined_insert(query, build_chunk, self.num_locations, desc="Locations")
+        self._locations = locations
         logger.info(f"{len(locations)} ubicaciones creadas")
 
-    def generate_citizens(self):
+    async def generate_citizens(self):
         """
         Genera ciudadanos con una 'Semilla de Riesgo'.
         Esta semilla es la variable latente que la IA intentará descubrir.
         """
         print(f"👥 Poblando la ciudad con {self.num_citizens} ciudadanos...")
-        citizens = []
-        for i in range(self.num_citizens):
-            # Distribución Beta: La mayoría es buena gente (riesgo bajo), 
-            # pocos son muy peligrosos
-            risk_seed = random.betavariate(2, 10) 
-            
-            citizens.append({
-                "id": i,
-                "name": fake.name(),
-                "born": fake.year(),
-                "risk_seed": risk_seed,  # <--- EL SECRETO
-                "job": fake.job(),
-                "address": fake.address()
-            })
+        job_pool = tuple(fake.job() for _ in range(JOB_POOL_SIZE))
 
         query = """
         UNWIND $batch as row
@@ -131,204 +299,488 @@ class PreCrimeCityGenerator:
             c.risk_seed = row.risk_seed, c.job = row.job,
             c.address = row.address, c.status = 'Active'
         """
-        self._batch_insert(query, citizens)
-        logger.info(f"{len(citizens)} ciudadanos creados")
+        ids, risks = [], []
+
+        def build_chunk(start, stop):
+            chunk = self._build_citizens(start, stop, job_pool)
+            # Del bloque solo se conservan los arrays que usan las fases siguientes
+            ids.append(np.fromiter((c["id"] for c in chunk), dtype=np.int64, count=len(chunk)))
+            risks.append(np.fromiter((c["risk_seed"] for c in chunk), dtype=np.float64, count=len(chunk)))
+            return chunk
+
+        await self._pipelined_insert(query, build_chunk, self.num_citizens, desc="Citizens")
+        self._citizen_ids = np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+        self._citizen_risks = np.concatenate(risks) if risks else np.empty(0, dtype=np.float64)
+        logger.info(f"{len(self._citizen_ids)} ciudadanos creados")
+
+    @staticmethod
+    def _build_locations(start, stop):
+        """Construye las ubicaciones [start, stop) con columnas contiguas."""
+        n = stop - start
+        street_name = fake.street_name  # Resolución del provider una sola vez
+        df = pd.DataFrame({
+            "id": [f"LOC_{i}" for i in range(start, stop)],
+            "street": [street_name() for _ in range(n)],
+            "type": rng.choice(LOCATION_TYPES, n),
+            # Coordenadas en bloque (mismo rango que fake.latitude/longitude, sin Decimal)
+            "coord_x": rng.uniform(-90, 90, n),
+            "coord_y": rng.uniform(-180, 180, n),
+        })
+        df["name"] = df["street"] + " " + df["type"]
+        df["env_risk"] = df["type"].map(ENV_RISK).fillna(DEFAULT_ENV_RISK)
+        # Se pasan a registros solo para el envío a Neo4j
+        return df[["id", "name", "type", "env_risk", "coord_x", "coord_y"]].to_dict(orient="records")
 
-    def generate_social_graph(self):
+    @staticmethod
+    def _build_citizens(start, stop, job_pool):
+        """Construye los ciudadanos [start, stop) con columnas contiguas."""
+        n = stop - start
+        # Métodos ligados fuera de los bucles: el proxy de Faker resuelve el
+        # provider en cada acceso a atributo
+        name, address = fake.name, fake.address
+        return pd.DataFrame({
+            "id": np.arange(start, stop),
+            "name": [name() for _ in range(n)],
+            # Entero como en el API (CitizenCreate.born), no el string de fake.year()
+            "born": rng.integers(BORN_RANGE[0], BORN_RANGE[1] + 1, n),
+            # Distribución Beta: La mayoría es buena gente (riesgo bajo), 
+            # pocos son muy peligrosos
+            "risk_seed": rng.beta(2, 10, n),  # <--- EL SECRETO
+            "job": fake.random_elements(elements=job_pool, length=n, unique=False),
+            "address": [address() for _ in range(n)],
+        }).to_dict(orient="records")
+
+    async def generate_social_graph(self):
         """
         Crea la red social (:KNOWS).
         Usa lógica de 'Homofilia': Criminales conocen criminales.
         """
         print("🕸️ Tejiendo la red social...")
         
-        # Recuperamos los IDs y sus riesgos para calcular lógica en Python
-        with self.driver.session() as session:
-            result = session.run("MATCH (c:Citizen) RETURN c.id as id, c.risk_seed as risk")
-            population = [{"id": r["id"], "risk": r["risk"]} for r in result]
+        ids, risks = await self._get_citizens()
+        src, dst = self._sample_social_links(ids, risks)
 
-        relationships = []
-        
-        for person in tqdm(population, desc="Social Links"):
-            # Lógica 1: Vecinos (IDs cercanos simulan vecindario físico)
-            # Lógica 2: Afinidad de riesgo (Pandillas)
-            
-            num_friends = random.randint(3, 15)
-            potential_friends = random.sample(population, min(50, len(population)))
-            
-            for friend in potential_friends:
-                if person["id"] == friend["id"]: 
-                    continue
-                
-                # Probabilidad base de conexión
-                prob = 0.1 
-                
-                # Si ambos tienen alto riesgo, es muy probable que se conozcan (Cómplices)
-                if person["risk"] > 0.6 and friend["risk"] > 0.6:
-                    prob += 0.5  # HOMOFILIA PROGRAMADA
-                
-                # Vecindario físico (IDs cercanos)
-                if abs(person["id"] - friend["id"]) < 20:
-                    prob += 0.2
-                
-                if random.random() < prob:
-                    since_year = random.randint(2015, 2025)
-                    relationships.append({
-                        "p1": person["id"], 
-                        "p2": friend["id"],
-                        "since": since_year
-                    })
+        # Filas [p1, p2, since]: dos búsquedas por el índice citizen_id en orden
+        # (sin producto cartesiano) y un único :KNOWS por par. Los pares ya son
+        # únicos: sobre una base recién limpiada basta con CREATE
+        if self._fresh:
+            write = "CREATE (a)-[:KNOWS {since: row[2]}]->(b)"
+        else:
+            write = "MERGE (a)-[r:KNOWS]->(b)\n        ON CREATE SET r.since = row[2]"
+        action = f"""
+        MATCH (a:Citizen {{id: row[0]}}) USING INDEX a:Citizen(id)
+        WITH a, row
+        MATCH (b:Citizen {{id: row[1]}}) USING INDEX b:Citizen(id)
+        {write}
+        """
+        # Un solo envío en vuelo: las escrituras de envíos simultáneos sobre los
+        # mismos nodos destino se bloquearían entre sí
+        created = await self._pipeline(
+            self._iter_social_links(ids, src, dst),
+            lambda rows: self._iterate_insert(action, rows, batch_size=ITERATE_BATCH_SIZE),
+            depth=1, desc="Social Links"
+        )
+        logger.info(f"{created} relaciones sociales creadas")
 
-        query = """
-        UNWIND $batch as row
-        MATCH (a:Citizen {id: row.p1}), (b:Citizen {id: row.p2})
-        MERGE (a)-[:KNOWS {since: row.since}]->(b)
+    @staticmethod
+    def _sample_social_links(ids, risks):
         """
-        self._batch_insert(query, relationships, batch_size=1000)
-        logger.info(f"{len(relationships)} relaciones sociales creadas")
+        Muestrea las aristas :KNOWS.
+
+        Cada ciudadano evalúa SOCIAL_CANDIDATES candidatos al azar. Con Numba
+        el bucle de homofilia se compila a código nativo y se reparte entre
+        hilos con prange; sin Numba se evalúa como máscara sobre la matriz
+        (ciudadanos x candidatos).
+
+        Se ejecuta en el hilo principal (el kernel paralelo no debe lanzarse
+        desde hilos auxiliares). Devuelve (origen, destino) como posiciones
+        int32 en ids, ordenadas por origen (la mitad de memoria que int64 para
+        ~N*SOCIAL_CANDIDATES aristas).
+        """
+        n = len(ids)
+        if n < 2:
+            empty = np.empty(0, dtype=np.int32)
+            return empty, empty
+
+        n_samples = min(SOCIAL_CANDIDATES, n)
+
+        if NUMBA_AVAILABLE:
+            # La semilla del kernel sale de rng para heredar SEED
+            seed = np.uint64(rng.integers(2**63))
+            links = _sample_links_parallel(ids, risks, n_samples, seed)
+            rows, cols = np.nonzero(links >= 0)
+            return rows.astype(np.int32), links[rows, cols]
+        return _sample_links_numpy(ids, risks, n_samples)
 
-    def generate_routines(self):
+    @staticmethod
+    def _iter_social_links(ids, src, dst, block_rows=SOCIAL_STREAM_ROWS):
+        """
+        Produce las filas [p1, p2, since] por bloques de ~block_rows aristas.
+
+        Los cortes caen en cambios de ciudadano origen, así que eliminar los
+        pares repetidos dentro de cada bloque equivale a hacerlo sobre toda la
+        red (y evita pagar el MERGE y sus locks en el servidor). Solo el
+        bloque en curso existe como lista de Python.
+        """
+        cuts = np.searchsorted(src, src[block_rows::block_rows])
+        bounds = np.unique(np.concatenate(([0], cuts, [len(src)])))
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            # Pares únicos (las auto-conexiones ya se descartan en el kernel)
+            pairs = np.unique(np.stack((ids[src[start:stop]], ids[dst[start:stop]]), axis=1), axis=0)
+            since = rng.integers(2015, 2026, size=len(pairs), dtype=np.int16)
+            yield np.column_stack((pairs, since)).tolist()
+
+    async def generate_routines(self):
         """
         Genera rutinas diarias (:VISITS).
         Las personas visitan lugares regularmente (casa, trabajo, ocio).
         """
         print("🚶 Estableciendo rutinas diarias...")
-        visits = []
-        
-        with self.driver.session() as session:
-            citizens = session.run("MATCH (c:Citizen) RETURN c.id as id").value()
-            locations = session.run("MATCH (l:Location) RETURN l.id as id, l.type as type").data()
-
-        for cid in tqdm(citizens, desc="Routines"):
-            # Cada persona visita 3-7 lugares regularmente
-            num_places = random.randint(3, 7)
-            regular_places = random.sample(locations, num_places)
-            
-            for place in regular_places:
-                frequency = "daily" if place["type"] in ["Cafe", "Park"] else "weekly"
-                visits.append({
-                    "cid": cid,
-                    "lid": place["id"],
-                    "frequency": frequency
-                })
+        citizen_ids, _ = await self._get_citizens()
+        locations = await self._get_locations()
+        visits = self._sample_routines(citizen_ids, locations)
 
-        query = """
+        write = "CREATE" if self._fresh else "MERGE"
+        # Filas agrupadas por ubicación: una búsqueda por id (string) de cada
+        # ubicación distinta del lote, no una por fila
+        query = f"""
         UNWIND $batch as row
-        MATCH (c:Citizen {id: row.cid})
-        MATCH (l:Location {id: row.lid})
-        MERGE (c)-[:VISITS {frequency: row.frequency}]->(l)
+        WITH row.lid as lid, collect(row) as rows
+        MATCH (l:Location {{id: lid}}) USING INDEX l:Location(id)
+        UNWIND rows as row
+        MATCH (c:Citizen {{id: row.cid}}) USING INDEX c:Citizen(id)
+        {write} (c)-[:VISITS {{frequency: row.frequency}}]->(l)
         """
-        self._batch_insert(query, visits, batch_size=1000)
+        # Sin barra de progreso: la fase es corta y el log final basta
+        await self._batch_insert(query, visits, batch_size=REL_BATCH_SIZE)
         logger.info(f"{len(visits)} rutinas establecidas")
 
-    def generate_crimes(self):
+    @staticmethod
+    def _sample_routines(citizen_ids, locations):
+        """
+        Muestrea las aristas :VISITS sobre índices enteros.
+
+        Cada ciudadano elige 3-7 lugares distintos a partir de una matriz de
+        candidatos (ciudadanos x 7) sacada con rng.integers; solo se vuelven a
+        sortear las posiciones repetidas dentro de una fila. Con muy pocas
+        ubicaciones (las repeticiones serían frecuentes) se ordenan claves
+        aleatorias por fila.
+        """
+        n, n_locations = len(citizen_ids), len(locations)
+        if not n or not n_locations:
+            return []
+
+        # Cada persona visita 3-7 lugares regularmente
+        max_places = min(7, n_locations)
+        num_places = rng.integers(min(3, max_places), max_places + 1, size=n)
+        if n_locations >= 2 * max_places:
+            places = rng.integers(0, n_locations, size=(n, max_places))
+            earlier = np.tri(max_places, k=-1, dtype=bool)
+            while True:
+                # Posición repetida: coincide con alguna anterior de su fila
+                dup = ((places[:, :, None] == places[:, None, :]) & earlier).any(axis=2)
+                if not dup.any():
+                    break
+                places[dup] = rng.integers(0, n_locations, size=int(dup.sum()))
+        else:
+            keys = rng.random((n, n_locations))
+            places = np.argpartition(keys, max_places - 1, axis=1)[:, :max_places]
+            order = np.take_along_axis(keys, places, axis=1).argsort(axis=1)
+            places = np.take_along_axis(places, order, axis=1)
+        rows, cols = np.nonzero(np.arange(max_places) < num_places[:, None])
+        place_idx = places[rows, cols].tolist()
+        cids = citizen_ids[rows].tolist()
+
+        loc_ids = [l["id"] for l in locations]
+        frequencies = ["daily" if l["type"] in ["Cafe", "Park"] else "weekly" for l in locations]
+        return [
+            {"cid": cid, "lid": loc_ids[j], "frequency": frequencies[j]}
+            for cid, j in zip(cids, place_idx)
+        ]
+
+    async def generate_crimes(self):
         """
         Genera el 'Ground Truth' (:COMMITTED_CRIME).
         Solo ciudadanos con alto risk_seed cometen crímenes.
+
+        Los crímenes se insertan con CREATE (sin comprobar duplicados):
+        se asume una base limpia tras clear_database().
         """
         print("🚨 Generando historial criminal...")
-        crimes = []
         
-        # Recuperar ciudadanos de alto riesgo y ubicaciones
-        with self.driver.session() as session:
-            high_risk_citizens = session.run(
-                "MATCH (c:Citizen) WHERE c.risk_seed > 0.6 RETURN c.id as id, c.risk_seed as risk"
-            ).data()
-            locations = session.run("MATCH (l:Location) RETURN l.id as id, l.type as type, l.env_risk as risk").data()
-
-        if not high_risk_citizens:
+        # Ciudadanos de alto riesgo y ubicaciones
+        citizen_ids, risks = await self._get_citizens()
+        high_risk = risks > 0.6
+        locations = await self._get_locations()
+
+        if not high_risk.any():
             print("⚠️ No hay ciudadanos de alto riesgo generados.")
             logger.warning("No se generaron crímenes (no hay ciudadanos de alto riesgo)")
             return
 
-        for criminal in high_risk_citizens:
-            # Cuantos más crímenes cometa, más fácil será para GraphSAGE detectarlo
-            # Criminales más peligrosos cometen más crímenes
-            num_crimes = random.randint(1, int(criminal["risk"] * 10)) 
-            
-            for _ in range(num_crimes):
-                # Prefieren ubicaciones de alto riesgo o valor
-                high_value_locations = [l for l in locations if l["risk"] > 0.5]
-                if high_value_locations:
-                    target = random.choice(high_value_locations)
-                else:
-                    target = random.choice(locations)
-                
-                # CRIMEN CONTEXTUAL
-                if target["type"] == "Bank":
-                    crime_type = "Robbery"
-                    severity = random.randint(7, 10)
-                elif target["type"] == "Jewelry Store":
-                    crime_type = "Robbery"
-                    severity = random.randint(6, 9)
-                elif target["type"] == "Dark Alley":
-                    crime_type = "Assault"
-                    severity = random.randint(4, 8)
-                elif target["type"] == "Park":
-                    crime_type = "Vandalism"
-                    severity = random.randint(2, 5)
-                else:
-                    crime_type = random.choice(["Theft", "Assault", "Vandalism"])
-                    severity = random.randint(3, 7)
-                
-                crimes.append({
-                    "cid": criminal["id"],
-                    "lid": target["id"],
-                    "type": crime_type,
-                    "severity": severity,
-                    "date": fake.date_between(start_date='-2y', end_date='today').isoformat()
-                })
+        crimes = self._sample_crimes(citizen_ids[high_risk], risks[high_risk], locations)
 
+        # Igual que en las rutinas: una búsqueda por ubicación distinta del lote
         query = """
         UNWIND $batch as row
-        MATCH (c:Citizen {id: row.cid})
-        MATCH (l:Location {id: row.lid})
-        MERGE (c)-[:COMMITTED_CRIME {
+        WITH row.lid as lid, collect(row) as rows
+        MATCH (l:Location {id: lid}) USING INDEX l:Location(id)
+        UNWIND rows as row
+        MATCH (c:Citizen {id: row.cid}) USING INDEX c:Citizen(id)
+        CREATE (c)-[:COMMITTED_CRIME {
             date: row.date, 
             type: row.type, 
             severity: row.severity
         }]->(l)
         """
-        self._batch_insert(query, crimes)
+        await self._batch_insert(query, crimes, batch_size=REL_BATCH_SIZE, desc="Crimes")
         logger.info(f"{len(crimes)} crímenes históricos generados")
 
-    def _batch_insert(self, query, data, batch_size=500):
-        """Helper para insertar datos en bloques y no saturar la RAM."""
+    @staticmethod
+    def _sample_crimes(criminal_ids, risks, locations):
+        """
+        Muestrea el historial criminal como un problema plano de muestreo.
+
+        Se sortea el número de crímenes por criminal, se repiten sus IDs y se
+        resuelven tipo, ubicación, severidad y fecha para todos los crímenes
+        a la vez; los diccionarios se construyen solo al final. El tipo se
+        sortea primero y la ubicación sale del índice de ubicaciones
+        compatibles con ese tipo (robos en bancos, vandalismo en parques...).
+        """
+        # Cuantos más crímenes cometa, más fácil será para GraphSAGE detectarlo
+        # Criminales más peligrosos cometen más crímenes
+        counts = rng.integers(1, (risks * 10).astype(np.int64) + 1)
+        cids = np.repeat(criminal_ids, counts)
+        total = int(counts.sum())
+
+        # Índice tipo de crimen -> ubicaciones compatibles (perfil del tipo de
+        # ubicación, o cualquier tipo por defecto si no tiene perfil), por
+        # lookup en las tablas precalculadas
+        location_types = np.fromiter(
+            (_LOCATION_TYPE_INDEX.get(l["type"], _OTHER_LOCATION) for l in locations),
+            dtype=np.intp, count=len(locations)
+        )
+        compatible = _COMPATIBLE[location_types]
+        by_type = [np.flatnonzero(compatible[:, k]) for k in range(len(_CRIME_TYPES))]
+
+        # Sortear el tipo entre los que tienen alguna ubicación en la ciudad
+        available = [k for k, pool in enumerate(by_type) if len(pool)]
+        weights = np.array([CRIME_TYPE_WEIGHTS[_CRIME_TYPES[k]] for k in available])
+        type_idx = np.asarray(available)[rng.choice(len(available), total, p=weights / weights.sum())]
+
+        # Ubicación muestreada dentro del índice de su tipo: los índices de
+        # todos los tipos van en un único array plano (offset y tamaño por
+        # tipo) y se resuelven con un solo gather
+        sizes = np.array([len(pool) for pool in by_type])
+        offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        flat_pool = np.concatenate(by_type)
+        targets = flat_pool[offsets[type_idx] + rng.integers(0, sizes[type_idx])]
+
+        target_types = location_types[targets]
+        severities = rng.integers(_SEV_LOW[target_types], _SEV_HIGH[target_types] + 1)
+
+        # Fechas: desplazamientos enteros en días sobre la ventana del historial
+        start = np.datetime64(datetime.now().date() - timedelta(days=CRIME_HISTORY_DAYS), "D")
+        dates = (start + rng.integers(0, CRIME_HISTORY_DAYS + 1, total)).astype(str)
+
+        location_ids = [l["id"] for l in locations]
+        return [
+            {
+                "cid": c,
+                "lid": location_ids[t],
+                "type": _CRIME_TYPES[k],
+                "severity": sev,
+                "date": d
+            }
+            for c, t, k, sev, d in zip(
+                cids.tolist(), targets.tolist(), type_idx.tolist(), severities.tolist(), dates.tolist()
+            )
+        ]
+
+    async def _get_citizens(self):
+        """
+        (ids, risk_seeds) de los ciudadanos de esta ejecución; si no se
+        generaron aquí, se leen de Neo4j una única vez.
+        """
+        if self._citizen_ids is None:
+            async with self.driver.session() as session:
+                result = await session.run(
+                    "MATCH (c:Citizen) RETURN c.id as id, c.risk_seed as risk_seed"
+                )
+                records = await result.data()
+            self._citizen_ids = np.fromiter((r["id"] for r in records), dtype=np.int64, count=len(records))
+            self._citizen_risks = np.fromiter(
+                (r["risk_seed"] for r in records), dtype=np.float64, count=len(records)
+            )
+        return self._citizen_ids, self._citizen_risks
+
+    async def _get_locations(self):
+        """Ubicaciones de esta ejecución; si no se generaron aquí, se leen de Neo4j."""
+        if self._locations is None:
+            async with self.driver.session() as session:
+                result = await session.run(
+                    "MATCH (l:Location) RETURN l.id as id, l.type as type, l.env_risk as env_risk"
+                )
+                self._locations = await result.data()
+        return self._locations
+
+    async def _pipelined_insert(self, query, build_chunk, total, batch_size=NODE_BATCH_SIZE, desc=None):
+        """
+        Genera e inserta por bloques solapando CPU y red: el bloque siguiente
+        se construye en un hilo (build_chunk(start, stop)) mientras los
+        anteriores se confirman en Neo4j. Como mucho PIPELINE_DEPTH bloques
+        esperan inserción; la generación es secuencial (RNG reproducible).
+
+        Los bloques no se conservan: si hacen falta después, build_chunk
+        guarda lo necesario.
+
+        Returns:
+            Número de filas insertadas
+        """
+        chunks = (
+            build_chunk(start, min(start + batch_size, total))
+            for start in range(0, total, batch_size)
+        )
+        return await self._pipeline(
+            chunks, lambda chunk: self._batch_insert(query, chunk, batch_size=batch_size),
+            total=total, desc=desc
+        )
+
+    async def _pipeline(self, chunks, insert, depth=PIPELINE_DEPTH, total=None, desc=None):
+        """
+        Consume un iterador de bloques en un hilo (cada next() construye el
+        bloque siguiente) mientras como mucho `depth` bloques anteriores se
+        insertan con `insert(chunk)`. La generación es secuencial (RNG
+        reproducible).
+
+        Returns:
+            Número de filas insertadas
+        """
+        pending = []
+        inserted = 0
+
+        with tqdm(total=total, desc=desc, unit="rows", mininterval=PROGRESS_MININTERVAL, disable=desc is None) as pbar:
+            async def insert_chunk(chunk):
+                await insert(chunk)
+                pbar.update(len(chunk))
+
+            try:
+                while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                    if len(pending) >= depth:
+                        await pending.pop(0)
+                    pending.append(asyncio.create_task(insert_chunk(chunk)))
+                    inserted += len(chunk)
+
+                await asyncio.gather(*pending)
+            except BaseException:
+                # Si falla un bloque (o la generación) no se sigue escribiendo:
+                # se cancelan y recogen las inserciones en vuelo antes de propagar
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                raise
+
+        return inserted
+
+    async def _batch_insert(self, query, data, batch_size=REL_BATCH_SIZE, desc=None):
+        """
+        Helper para insertar datos en bloques y no saturar la RAM.
+        Cada sentencia lleva batch_size filas y una transacción agrupa
+        sentencias hasta ~COMMIT_ROWS filas.
+        Hasta INSERT_CONCURRENCY workers, cada uno con una única sesión para
+        toda la llamada, toman transacciones de una cola común y las envían
+        como transacciones gestionadas (execute_write, con reintentos ante
+        deadlocks transitorios). El límite de escrituras en vuelo es global,
+        también entre llamadas simultáneas.
+        El progreso se actualiza por transacción confirmada, no por fila.
+        """
         if not data:
             return
-            
-        with self.driver.session() as session:
-            total = len(data)
-            for i in range(0, total, batch_size):
-                batch = data[i:i+batch_size]
-                session.run(query, batch=batch)
 
-    def get_statistics(self):
+        rows_per_tx = max(1, COMMIT_ROWS // batch_size) * batch_size
+        starts = iter(range(0, len(data), rows_per_tx))
+        num_workers = min(INSERT_CONCURRENCY, -(-len(data) // rows_per_tx))
+
+        with tqdm(total=len(data), desc=desc, unit="rows", mininterval=PROGRESS_MININTERVAL, disable=desc is None) as pbar:
+            async def worker():
+                async with self.driver.session() as session:
+                    # El iterador es compartido: cada worker toma el siguiente bloque libre
+                    for start in starts:
+                        rows = data[start:start + rows_per_tx]
+                        async with self._write_slots:
+                            await session.execute_write(self._write_batch, query, rows, batch_size)
+                        pbar.update(len(rows))
+
+            await asyncio.gather(*(worker() for _ in range(num_workers)))
+
+    async def _iterate_insert(self, action, data, batch_size=ITERATE_BATCH_SIZE):
+        """
+        Inserción por lotes del lado del servidor con apoc.periodic.iterate.
+        La lista viaja una sola vez como parámetro y Neo4j gestiona los lotes
+        y los commits. `action` es Cypher sobre la variable `row`.
+
+        Serie (parallel: false): los MERGE de relaciones sobre nodos
+        compartidos se bloquean entre sí si se paralelizan. Sin APOC se
+        recurre a _batch_insert.
+        """
+        if not data:
+            return
+
+        query = """
+        CALL apoc.periodic.iterate(
+            'UNWIND $rows AS row RETURN row',
+            $action,
+            {batchSize: $batch_size, parallel: false, params: {rows: $rows}}
+        )
+        YIELD committedOperations, failedOperations, errorMessages
+        RETURN committedOperations, failedOperations, errorMessages
+        """
+        try:
+            async with self.driver.session() as session:
+                result = await session.run(query, rows=data, action=action, batch_size=batch_size)
+                summary = await result.single()
+        except ClientError as e:
+            if e.code != "Neo.ClientError.Procedure.ProcedureNotFound":
+                raise
+            logger.warning("APOC no disponible, usando inserción por lotes desde el cliente")
+            await self._batch_insert(
+                f"UNWIND $batch as row {action}", data, batch_size=REL_BATCH_SIZE
+            )
+            return
+
+        if summary["failedOperations"]:
+            logger.warning(
+                f"apoc.periodic.iterate: {summary['failedOperations']} operaciones fallidas "
+                f"({summary['errorMessages']})"
+            )
+
+    @staticmethod
+    async def _write_batch(tx, query, rows, batch_size):
+        """Unidad de trabajo de _batch_insert: una sentencia por lote, un único commit."""
+        for i in range(0, len(rows), batch_size):
+            result = await tx.run(query, batch=rows[i:i+batch_size])
+            await result.consume()
+
+    async def get_statistics(self):
         """Obtiene estadísticas de la ciudad generada."""
         print("\n📊 Estadísticas de la ciudad:")
-        with self.driver.session() as session:
-            stats = {}
-            
-            # Ciudadanos
-            stats['citizens'] = session.run("MATCH (c:Citizen) RETURN count(c) as count").single()["count"]
-            
-            # Ubicaciones
-            stats['locations'] = session.run("MATCH (l:Location) RETURN count(l) as count").single()["count"]
-            
-            # Relaciones sociales
-            stats['social_links'] = session.run("MATCH ()-[:KNOWS]->() RETURN count(*) as count").single()["count"]
-            
-            # Rutinas
-            stats['routines'] = session.run("MATCH ()-[:VISITS]->() RETURN count(*) as count").single()["count"]
-            
-            # Crímenes
-            stats['crimes'] = session.run("MATCH ()-[:COMMITTED_CRIME]->() RETURN count(*) as count").single()["count"]
-            
-            # Criminales únicos
-            stats['criminals'] = session.run("MATCH (c:Citizen)-[:COMMITTED_CRIME]->() RETURN count(DISTINCT c) as count").single()["count"]
-            
-            # Densidad de la red
-            if stats['citizens'] > 1:
-                stats['network_density'] = stats['social_links'] / (stats['citizens'] * (stats['citizens'] - 1))
+        # Un único viaje de ida y vuelta: cada conteo en su subconsulta y la
+        # densidad de la red calculada en el servidor
+        query = """
+        CALL { MATCH (c:Citizen) RETURN count(c) as citizens }
+        CALL { MATCH (l:Location) RETURN count(l) as locations }
+        CALL { MATCH ()-[:KNOWS]->() RETURN count(*) as social_links }
+        CALL { MATCH ()-[:VISITS]->() RETURN count(*) as routines }
+        CALL { MATCH ()-[:COMMITTED_CRIME]->() RETURN count(*) as crimes }
+        CALL { MATCH (c:Citizen)-[:COMMITTED_CRIME]->() RETURN count(DISTINCT c) as criminals }
+        RETURN citizens, locations, social_links, routines, crimes, criminals,
+               CASE WHEN citizens > 1
+                    THEN toFloat(social_links) / (citizens * (citizens - 1))
+               END as network_density
+        """
+        async with self.driver.session() as session:
+            record = await (await session.run(query)).single()
+            stats = {k: v for k, v in record.items() if v is not None}
             
             print(f"  👥 Ciudadanos: {stats['citizens']}")
             print(f"  🏢 Ubicaciones: {stats['locations']}")
@@ -343,22 +795,14 @@ class PreCrimeCityGenerator:
 
 
 # --- EJECUCIÓN PRINCIPAL ---
-if __name__ == "__main__":
-    import sys
-    from utils import setup_logging
-    
-    setup_logging()
-    
+async def main(num_citizens=NUM_CITIZENS, num_locations=NUM_LOCATIONS):
+    """Genera la ciudad completa sobre una única conexión asíncrona."""
     print("=" * 70)
     print("🚨 PRE-CRIME CITY GENERATOR 🚨")
     print("Generando ciudad sintética estilo Minority Report")
     print("=" * 70)
     print()
     
-    # Permitir configuración desde línea de comandos
-    num_citizens = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_CITIZENS
-    num_locations = int(sys.argv[2]) if len(sys.argv) > 2 else NUM_LOCATIONS
-    
     generator = PreCrimeCityGenerator(
         num_citizens=num_citizens,
         num_locations=num_locations
@@ -367,14 +811,15 @@ if __name__ == "__main__":
     try:
         start_time = time.time()
         
-        generator.create_constraints()
-        generator.clear_database()
+        await generator.create_constraints()
+        await generator.clear_database()
         
-        generator.generate_locations()
-        generator.generate_citizens()
-        generator.generate_social_graph()
-        generator.generate_routines()
-        generator.generate_crimes()
+        await generator.generate_locations()
+        await generator.generate_citizens()
+        await generator.generate_social_graph()
+        # Rutinas y crímenes son independientes: sus lotes comparten el
+        # límite de escrituras del generador
+        await asyncio.gather(generator.generate_routines(), generator.generate_crimes())
         
         elapsed = time.time() - start_time
         
@@ -384,7 +829,7 @@ if __name__ == "__main__":
         print(f"⏱️  Tiempo total: {elapsed:.2f} segundos")
         print("=" * 70)
         
-        generator.get_statistics()
+        await generator.get_statistics()
         
         print()
         print("🎯 Próximos pasos:")
@@ -396,9 +841,23 @@ if __name__ == "__main__":
         print("  3. Ejecuta el script de hidratación de datos:")
         print("     python src/data_hydrator.py")
         
+    finally:
+        await generator.close()
+
+
+if __name__ == "__main__":
+    import sys
+    from utils import setup_logging
+    
+    setup_logging()
+    
+    # Permitir configuración desde línea de comandos
+    num_citizens = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_CITIZENS
+    num_locations = int(sys.argv[2]) if len(sys.argv) > 2 else NUM_LOCATIONS
+    
+    try:
+        asyncio.run(main(num_citizens, num_locations))
     except Exception as e:
         print(f"\n❌ Error: {e}")
         logger.error(f"Error en generación de ciudad: {e}", exc_info=True)
         sys.exit(1)
-    finally:
-        generator.close()
@@ -1,5 +1,9 @@
 from neo4j import GraphDatabase
 
+# Filas por sentencia UNWIND dentro de la transacción de exportación
+EXPORT_BATCH_SIZE = 10000
+
+
 class Neo4jConnector:
     def __init__(self, uri, user, password):
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
@@ -13,14 +17,21 @@ class Neo4jConnector:
         Crea relaciones WILL_COMMIT marcadas en ROJO.
         """
         query = """
+        WITH timestamp() as ts
         UNWIND $batch as row
         MATCH (p:Person {id: row.source})
         MATCH (l:Location {id: row.target})
         MERGE (p)-[r:WILL_COMMIT]->(l)
         SET r.risk_score = row.risk,
             r.color = '#FF0000',  // Rojo "Minority Report"
-            r.timestamp = timestamp()
+            r.timestamp = ts
         """
+
+        # Una única transacción; listas grandes se parten en varios UNWIND
+        def write(tx):
+            for start in range(0, len(predictions_list), EXPORT_BATCH_SIZE):
+                tx.run(query, batch=predictions_list[start:start + EXPORT_BATCH_SIZE]).consume()
+
         with self.driver.session() as session:
-            session.run(query, batch=predictions_list)
+            session.execute_write(write)
             print(f"{len(predictions_list)} predicciones de crimen insertadas en Neo4j.")
@@ -9,8 +9,10 @@ Esta es la Parte 3: Enriquecer y preparar los datos para la IA.
 
 import torch
 import numpy as np
+import pandas as pd
 from neo4j import GraphDatabase
 import logging
+from collections import Counter
 from typing import Dict, Tuple, List
 from torch_geometric.data import Data
 import pickle
@@ -18,6 +20,10 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+CURRENT_YEAR = 2026
+# Columnas del vector de features: [edad, degree, lugares, riesgo_ambiental, crímenes]
+FEATURE_COLUMNS = ['age_norm', 'degree_norm', 'places_norm', 'env_risk', 'crimes_norm']
+
 
 class PreCrimeDataHydrator:
     """
@@ -53,72 +59,58 @@ class PreCrimeDataHydrator:
         """
         print("📊 Extrayendo características de nodos...")
         
+        # Un agregado por subconsulta (sin producto cartesiano amigos x lugares
+        # x crímenes) y la normalización ya resuelta en Cypher: cada fila
+        # llega como vector de features final
         query = """
         MATCH (c:Citizen)
-        OPTIONAL MATCH (c)-[:KNOWS]-(friend)
-        OPTIONAL MATCH (c)-[:VISITS]->(loc:Location)
-        OPTIONAL MATCH (c)-[:COMMITTED_CRIME]->(crime_loc)
-        WITH c, 
-             count(DISTINCT friend) as num_friends,
-             count(DISTINCT loc) as num_places,
-             avg(loc.env_risk) as avg_env_risk,
-             count(DISTINCT crime_loc) as num_crimes
+        CALL {
+            WITH c
+            OPTIONAL MATCH (c)-[:KNOWS]-(friend)
+            RETURN count(DISTINCT friend) as num_friends
+        }
+        CALL {
+            WITH c
+            OPTIONAL MATCH (c)-[:VISITS]->(loc:Location)
+            RETURN count(DISTINCT loc) as num_places,
+                   avg(loc.env_risk) as avg_env_risk
+        }
+        CALL {
+            WITH c
+            OPTIONAL MATCH (c)-[:COMMITTED_CRIME]->(crime_loc)
+            RETURN count(DISTINCT crime_loc) as num_crimes
+        }
+        WITH c, num_friends, num_places, avg_env_risk, num_crimes,
+             coalesce($current_year - toInteger(c.born), 30) / 100.0 as age_norm,
+             log(1 + num_friends) / 5.0 as degree_norm,
+             num_places / 20.0 as places_norm,
+             num_crimes / 10.0 as crimes_norm
         RETURN c.id as id,
-               c.born as born,
-               c.risk_seed as risk_seed,
-               num_friends,
-               num_places,
-               coalesce(avg_env_risk, 0.0) as avg_env_risk,
-               num_crimes,
+               CASE WHEN age_norm > 1.0 THEN 1.0 ELSE age_norm END as age_norm,
+               CASE WHEN degree_norm > 1.0 THEN 1.0 ELSE degree_norm END as degree_norm,
+               CASE WHEN places_norm > 1.0 THEN 1.0 ELSE places_norm END as places_norm,
+               coalesce(avg_env_risk, 0.0) as env_risk,
+               CASE WHEN crimes_norm > 1.0 THEN 1.0 ELSE crimes_norm END as crimes_norm,
                CASE WHEN num_crimes > 0 THEN 1 ELSE 0 END as is_criminal
         ORDER BY c.id
         """
         
         with self.driver.session() as session:
-            result = session.run(query)
-            records = list(result)
-        
-        features_list = []
-        current_year = 2026
-        
-        for idx, record in enumerate(records):
-            # Mapeo de Neo4j ID a índice PyTorch
-            self.node_mapping[record["id"]] = idx
-            
-            # Normalizar edad (0-1)
-            age = current_year - int(record["born"]) if record["born"] else 30
-            age_norm = min(age / 100.0, 1.0)
-            
-            # Normalizar grado del nodo (log scale)
-            degree_norm = min(np.log1p(record["num_friends"]) / 5.0, 1.0)
-            
-            # Normalizar lugares visitados
-            places_norm = min(record["num_places"] / 20.0, 1.0)
-            
-            # Riesgo ambiental promedio
-            env_risk = record["avg_env_risk"]
-            
-            # Número de crímenes (normalizado)
-            crimes_norm = min(record["num_crimes"] / 10.0, 1.0)
-            
-            # Feature vector: [edad, degree, lugares, riesgo_ambiental, crímenes]
-            features = [
-                age_norm,
-                degree_norm,
-                places_norm,
-                env_risk,
-                crimes_norm
-            ]
-            
-            features_list.append(features)
-            
-            # Label: 1 si es criminal, 0 si no
-            self.labels.append(record["is_criminal"])
-        
-        self.node_features = torch.tensor(features_list, dtype=torch.float)
-        self.labels = torch.tensor(self.labels, dtype=torch.long)
-        
-        logger.info(f"✓ {len(features_list)} nodos con {len(features_list[0])} features cada uno")
+            df = session.run(query, current_year=CURRENT_YEAR).to_df()
+        
+        # Mapeo de Neo4j ID a índice PyTorch
+        self.node_mapping = dict(zip(df["id"].tolist(), range(len(df))))
+        
+        # Matriz float32 preasignada y rellenada por columnas: un único buffer
+        # C-contiguo (df.to_numpy() devolvería una vista en orden Fortran)
+        features = np.empty((len(df), len(FEATURE_COLUMNS)), dtype=np.float32)
+        for j, column in enumerate(FEATURE_COLUMNS):
+            features[:, j] = df[column].to_numpy()
+        self.node_features = torch.from_numpy(features)
+        # Label: 1 si es criminal, 0 si no
+        self.labels = torch.from_numpy(df["is_criminal"].to_numpy(np.int64))
+        
+        logger.info(f"✓ {self.node_features.shape[0]} nodos con {self.node_features.shape[1]} features cada uno")
         print(f"  Dimensión de features: {self.node_features.shape}")
         print(f"  Criminales detectados: {self.labels.sum().item()} ({self.labels.sum().item()/len(self.labels)*100:.1f}%)")
         
@@ -139,25 +131,21 @@ class PreCrimeDataHydrator:
         """
         
         with self.driver.session() as session:
-            result = session.run(query)
-            edges = list(result)
-        
-        edge_list = []
-        for edge in edges:
-            src_id = edge["source"]
-            tgt_id = edge["target"]
-            
-            # Convertir a índices PyTorch
-            if src_id in self.node_mapping and tgt_id in self.node_mapping:
-                src_idx = self.node_mapping[src_id]
-                tgt_idx = self.node_mapping[tgt_id]
-                edge_list.append([src_idx, tgt_idx])
-        
-        # Convertir a formato PyTorch Geometric: [2, num_edges]
-        if edge_list:
-            self.edge_index = torch.tensor(edge_list, dtype=torch.long).t().contiguous()
+            edges = session.run(query).to_df()
+        
+        # Convertir a índices PyTorch en bloque. Los IDs pueden no ser enteros
+        # densos (el API crea ciudadanos con apoc.cuid), así que se usa un
+        # índice hash en lugar de un array de remapeo; -1 = fuera del mapping
+        index = pd.Index(list(self.node_mapping))
+        if edges.empty:
+            src = tgt = np.empty(0, dtype=np.int64)
         else:
-            self.edge_index = torch.empty((2, 0), dtype=torch.long)
+            src = index.get_indexer(edges["source"])
+            tgt = index.get_indexer(edges["target"])
+        valid = (src >= 0) & (tgt >= 0)
+        
+        # Formato PyTorch Geometric: [2, num_edges]
+        self.edge_index = torch.from_numpy(np.stack((src[valid], tgt[valid])).astype(np.int64))
         
         logger.info(f"✓ {self.edge_index.shape[1]} aristas extraídas")
         print(f"  Dimensión del grafo: {self.edge_index.shape}")
@@ -177,33 +165,21 @@ class PreCrimeDataHydrator:
         MATCH (c:Citizen)-[crime:COMMITTED_CRIME]->(l:Location)
         RETURN crime.type as type,
                crime.severity as severity,
-               l.type as location_type,
-               crime.date as date
+               l.type as location_type
         """
         
         with self.driver.session() as session:
             result = session.run(query)
             crimes = list(result)
         
+        # Conteos con Counter (bucle en C) en lugar de dict.get fila a fila
         patterns = {
-            'by_type': {},
-            'by_location': {},
-            'by_severity': [],
+            'by_type': dict(Counter(crime['type'] for crime in crimes)),
+            'by_location': dict(Counter(crime['location_type'] for crime in crimes)),
+            'by_severity': [crime['severity'] for crime in crimes],
             'total': len(crimes)
         }
         
-        for crime in crimes:
-            # Por tipo de crimen
-            ctype = crime['type']
-            patterns['by_type'][ctype] = patterns['by_type'].get(ctype, 0) + 1
-            
-            # Por tipo de ubicación
-            ltype = crime['location_type']
-            patterns['by_location'][ltype] = patterns['by_location'].get(ltype, 0) + 1
-            
-            # Severidad
-            patterns['by_severity'].append(crime['severity'])
-        
         print(f"  Total de crímenes: {patterns['total']}")
         print(f"  Tipos de crimen: {list(patterns['by_type'].keys())}")
         print(f"  Severidad promedio: {np.mean(patterns['by_severity']):.2f}")
@@ -255,7 +231,7 @@ class PreCrimeDataHydrator:
         print(f"\n💾 Dataset guardado en: {filepath}")
         logger.info(f"Dataset guardado en {filepath}")
     
-    def split_data(self, data: Data, train_ratio=0.7, val_ratio=0.15) -> Data:
+    def split_data(self, data: Data, train_ratio=0.7, val_ratio=0.15, device=None) -> Data:
         """
         Divide el dataset en train/val/test.
         
@@ -263,6 +239,8 @@ class PreCrimeDataHydrator:
             data: Objeto Data
             train_ratio: Proporción de entrenamiento
             val_ratio: Proporción de validación
+            device: Dispositivo de las máscaras (por defecto, el de data.x);
+                se crean directamente allí, sin copia desde CPU
         
         Returns:
             Data con máscaras de train/val/test
@@ -270,18 +248,23 @@ class PreCrimeDataHydrator:
         print("\n✂️ Dividiendo dataset en train/val/test...")
         
         num_nodes = data.num_nodes
-        indices = torch.randperm(num_nodes)
+        if device is None:
+            device = data.x.device if data.x is not None else torch.device("cpu")
+        indices = torch.randperm(num_nodes, device=device)
         
         train_size = int(train_ratio * num_nodes)
         val_size = int(val_ratio * num_nodes)
         
-        data.train_mask = torch.zeros(num_nodes, dtype=torch.bool)
-        data.val_mask = torch.zeros(num_nodes, dtype=torch.bool)
-        data.test_mask = torch.zeros(num_nodes, dtype=torch.bool)
+        # Un único tensor de partición (0=train, 1=val, 2=test): cada posición
+        # de la permutación cae en su tramo con bucketize
+        bounds = torch.tensor([train_size, train_size + val_size], device=device)
+        positions = torch.arange(num_nodes, device=device)
+        split = torch.empty(num_nodes, dtype=torch.int8, device=device)
+        split[indices] = torch.bucketize(positions, bounds, right=True).to(torch.int8)
         
-        data.train_mask[indices[:train_size]] = True
-        data.val_mask[indices[train_size:train_size + val_size]] = True
-        data.test_mask[indices[train_size + val_size:]] = True
+        data.train_mask = split == 0
+        data.val_mask = split == 1
+        data.test_mask = split == 2
         
         print(f"  Train: {data.train_mask.sum().item()} nodos ({train_ratio*100:.0f}%)")
         print(f"  Val: {data.val_mask.sum().item()} nodos ({val_ratio*100:.0f}%)")
@@ -10,12 +10,31 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 from models import CrimeGenerator, PoliceDiscriminator
-from utils import setup_logging, load_config, create_dummy_graph, evaluate_model_performance
+from utils import setup_logging, load_config, create_dummy_graph, evaluate_model_performance, compile_models
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
 
+def _load_exported_pipeline(models_dir):
+    """Cargar el programa exportado (precrime.pt2) o None si no está disponible"""
+    program_path = models_dir / 'precrime.pt2'
+    if not program_path.exists():
+        return None
+    # Un .pt2 anterior a los .pth es de un entrenamiento previo
+    generator_path = models_dir / 'generator.pth'
+    if generator_path.exists() and program_path.stat().st_mtime < generator_path.stat().st_mtime:
+        logger.warning(f"⚠ {program_path} es anterior a {generator_path}, se usan los .pth")
+        return None
+    try:
+        pipeline = torch.export.load(program_path).module()
+    except Exception as e:
+        logger.warning(f"⚠ No se pudo cargar {program_path}, se usan los .pth: {e}")
+        return None
+    logger.info("✓ Programa exportado cargado")
+    return pipeline
+
+
 def evaluate():
     """Evaluar el modelo entrenado"""
     
@@ -46,26 +65,38 @@ def evaluate():
         logger.error("✗ No se encontró el modelo generador. Entrena primero.")
         return
     
-    in_dim = config['num_features']
-    hidden_dim = config['hidden_dim']
-    
-    generator = CrimeGenerator(in_dim, hidden_dim, in_dim).to(device)
-    discriminator = PoliceDiscriminator(in_dim, hidden_dim, 1).to(device)
-    
-    generator.load_state_dict(torch.load(models_dir / 'generator.pth'))
-    discriminator.load_state_dict(torch.load(models_dir / 'discriminator.pth'))
-    
-    logger.info("✓ Modelos cargados")
+    # Programa exportado: sin instanciar los modelos en Python ni trazarlos
+    pipeline = _load_exported_pipeline(models_dir)
+
+    if pipeline is None:
+        in_dim = config['num_features']
+        hidden_dim = config['hidden_dim']
+
+        generator = CrimeGenerator(in_dim, hidden_dim, in_dim).to(device)
+        discriminator = PoliceDiscriminator(in_dim, hidden_dim, 1).to(device)
+
+        generator.load_state_dict(torch.load(models_dir / 'generator.pth'))
+        discriminator.load_state_dict(torch.load(models_dir / 'discriminator.pth'))
+
+        logger.info("✓ Modelos cargados")
+
+        # Formas fijas: inductor fusiona las operaciones y reduce-overhead
+        # reproduce la inferencia como CUDA graph
+        compile_models(generator, discriminator, device=device)
+
+        generator.eval()
+        discriminator.eval()
     
     # Evaluar
     logger.info("\nEvaluando modelo...")
-    generator.eval()
-    discriminator.eval()
     
-    with torch.no_grad():
+    with torch.inference_mode():
         # Generar predicciones
-        predictions = generator(data.x, data.edge_index)
-        risk_scores = discriminator(predictions, data.edge_index)
+        if pipeline is not None:
+            risk_scores = pipeline(data.x, data.edge_index)
+        else:
+            predictions = generator(data.x, data.adj_t)
+            risk_scores = torch.sigmoid(discriminator(predictions, data.edge_index))
         
         # Calcular métricas
         metrics = evaluate_model_performance(risk_scores)
@@ -6,14 +6,22 @@ Feature Engineering para Project Pre-Crime (Parte 3):
 """
 
 from typing import Tuple
+from itertools import chain
 
 import os
 import pandas as pd
 import numpy as np
 import torch
+import torch_geometric.transforms as T
 from neo4j import GraphDatabase
 from dotenv import load_dotenv
 from torch_geometric.data import Data
+from torch_geometric.utils import coalesce
+
+# Ciudadanos origen por página al leer las aristas KNOWS de Neo4j
+EDGE_PAGE_SIZE = 100_000
+# Filas por sentencia UNWIND al persistir criminal_degree
+WRITE_BATCH_SIZE = 10_000
 
 
 def _get_driver_from_env():
@@ -25,23 +33,40 @@ def _get_driver_from_env():
     return GraphDatabase.driver(uri, auth=(user, password))
 
 
-def calculate_criminal_influence(driver) -> None:
+def calculate_criminal_influence(driver, full_df: pd.DataFrame, features_df: pd.DataFrame,
+                                 edge_index: torch.Tensor) -> None:
     """
-    Calcula, por cada ciudadano, cuántos vecinos tienen relación COMMITTED_CRIME
-    y persiste la propiedad c.criminal_degree.
+    Calcula, por cada ciudadano, cuántos vecinos (KNOWS, sin dirección) tienen
+    relación COMMITTED_CRIME con un scatter-add sobre edge_index, actualiza la
+    columna crim_deg y persiste la propiedad c.criminal_degree.
     """
     print("💧 Hidratando: Calculando influencia criminal del entorno...")
+    num_nodes = len(full_df)
+    committed = torch.from_numpy(full_df["committed"].to_numpy(dtype=np.int64))
+
+    # Ambas direcciones y sin duplicados: equivale a count(distinct friend)
+    both = torch.cat([edge_index, edge_index.flip(0)], dim=1)
+    src, dst = coalesce(both, num_nodes=num_nodes)
+    criminal_degree = torch.zeros(num_nodes, dtype=torch.long).scatter_add_(0, dst, committed[src])
+
+    degree = criminal_degree.numpy()
+    full_df["crim_deg"] = degree
+    features_df["crim_deg"] = degree.astype(np.float32)
+
     query = """
-    MATCH (c:Citizen)
-    OPTIONAL MATCH (c)-[:KNOWS]-(friend)-[:COMMITTED_CRIME]->()
-    WITH c, count(distinct friend) as criminal_friends
-    SET c.criminal_degree = criminal_friends
-    RETURN count(c) as updated
+    UNWIND $rows as row
+    MATCH (c:Citizen {id: row.id})
+    SET c.criminal_degree = row.deg
     """
+    rows = [{"id": cid, "deg": deg} for cid, deg in zip(full_df["id"].tolist(), degree.tolist())]
+
+    def write(tx):
+        for start in range(0, len(rows), WRITE_BATCH_SIZE):
+            tx.run(query, rows=rows[start:start + WRITE_BATCH_SIZE]).consume()
+
     with driver.session() as session:
-        res = session.run(query)
-        updated = res.single()["updated"] if res.peek() else 0
-        print(f"✅ Nodos actualizados con 'criminal_degree': {updated}")
+        session.execute_write(write)
+    print(f"✅ Nodos actualizados con 'criminal_degree': {len(rows)}")
 
 
 def extract_features_to_pandas(driver) -> Tuple[pd.DataFrame, pd.DataFrame]:
@@ -52,14 +77,13 @@ def extract_features_to_pandas(driver) -> Tuple[pd.DataFrame, pd.DataFrame]:
     print("📊 Extrayendo datos para vectorización...")
     query = """
     MATCH (c:Citizen)
-    RETURN c.id as id, c.born as born, c.job as job, c.criminal_degree as crim_deg, c.risk_seed as target
+    RETURN c.id as id, c.born as born, c.job as job, c.criminal_degree as crim_deg, c.risk_seed as target,
+           EXISTS { (c)-[:COMMITTED_CRIME]->() } as committed
     ORDER BY c.id
     """
     with driver.session() as session:
-        result = session.run(query)
-        rows = [r.data() for r in result]
+        df = session.run(query).to_df()
 
-    df = pd.DataFrame(rows)
     if df.empty:
         raise RuntimeError("No se encontraron ciudadanos en Neo4j para hidratar.")
 
@@ -74,26 +98,77 @@ def extract_features_to_pandas(driver) -> Tuple[pd.DataFrame, pd.DataFrame]:
     # criminal_degree: rellenar faltantes con 0
     df["crim_deg"] = pd.to_numeric(df["crim_deg"], errors="coerce").fillna(0)
 
-    # One-Hot Encoding de Trabajos
-    job_dummies = pd.get_dummies(df["job"].fillna("Unknown"), prefix="job")
-    df = pd.concat([df, job_dummies], axis=1)
-
     # Etiqueta/objetivo
     df["target"] = pd.to_numeric(df["target"], errors="coerce").fillna(0.0)
 
-    # Selección de features numéricas (mantiene orden por id ya que hicimos ORDER BY)
-    features = df.drop(columns=["born", "job"] + ["id", "target"]).copy()
-    features = features.fillna(0.0).astype(np.float32)
+    # One-Hot Encoding de Trabajos: los códigos categóricos (categorías
+    # ordenadas, como get_dummies) se escriben directamente en una única matriz
+    # float32, sin concat/drop/astype intermedios
+    jobs = pd.Categorical(df["job"].fillna("Unknown"))
+    job_columns = [f"job_{job}" for job in jobs.categories]
+    n = len(df)
+    matrix = np.zeros((n, 2 + len(job_columns)), dtype=np.float32)
+    matrix[:, 0] = df["crim_deg"].to_numpy()
+    matrix[:, 1] = df["age"].to_numpy()
+    matrix[np.arange(n), 2 + jobs.codes] = 1.0
+
+    # Features numéricas (mantiene orden por id ya que hicimos ORDER BY)
+    features = pd.DataFrame(matrix, columns=["crim_deg", "age"] + job_columns, copy=False)
 
     print(f"✅ Features procesadas. Dimensiones del tensor: {features.shape}")
     return df, features
 
 
-def load_graph_to_pyg(driver, features_df: pd.DataFrame, full_df: pd.DataFrame) -> Data:
+def extract_edge_index(driver, ids: np.ndarray) -> torch.Tensor:
+    """
+    Extrae la topología KNOWS mapeada a índices de fila 0..N-1.
+    ids debe venir ordenado (ORDER BY c.id), como en extract_features_to_pandas.
+    """
+    # ids ya viene ordenado: id -> posición de fila (0..N-1) por búsqueda binaria
+    def to_positions(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        pos = np.minimum(np.searchsorted(ids, values), len(ids) - 1)
+        return pos, ids[pos] == values
+
+    # Extraer aristas por páginas de ciudadanos origen (rangos de c.id sobre
+    # el índice único) y mapear cada página a índices según llega
+    edge_query = """
+    MATCH (c1:Citizen)-[:KNOWS]->(c2:Citizen)
+    WHERE c1.id >= $lo AND c1.id <= $hi
+    RETURN c1.id as source, c2.id as target
+    ORDER BY source, target
+    """
+    src_pages, dst_pages = [], []
+    with driver.session() as session:
+        for start in range(0, len(ids), EDGE_PAGE_SIZE):
+            page_ids = ids[start:start + EDGE_PAGE_SIZE]
+            result = session.run(edge_query, lo=int(page_ids[0]), hi=int(page_ids[-1]))
+            # Cada Record es una tupla (source, target): se vuelcan en streaming a
+            # un array int64 plano, sin dicts ni DataFrame intermedios
+            pairs = np.fromiter(chain.from_iterable(result), dtype=np.int64).reshape(-1, 2)
+            if len(pairs) == 0:
+                continue
+            src, src_ok = to_positions(pairs[:, 0])
+            dst, dst_ok = to_positions(pairs[:, 1])
+            # Ids que no están en el df (la posición no coincide): se filtran
+            valid = src_ok & dst_ok
+            src_pages.append(src[valid])
+            dst_pages.append(dst[valid])
+
+    if not src_pages:
+        # Grafo vacío: construir tensor sin aristas
+        return torch.empty((2, 0), dtype=torch.long)
+    return torch.from_numpy(
+        np.stack([np.concatenate(src_pages), np.concatenate(dst_pages)]).astype(np.int64)
+    )
+
+
+def load_graph_to_pyg(driver, features_df: pd.DataFrame, full_df: pd.DataFrame,
+                      edge_index: torch.Tensor = None) -> Data:
     """
     Construye Data de PyTorch Geometric:
       - x: matriz de características (float32)
       - edge_index: topología del grafo KNOWS (mapeada a índices 0..N-1)
+      - adj_t: la misma topología como adyacencia CSR transpuesta (spmm)
       - y: etiquetas (risk_seed), shape [N, 1]
     """
     print("🚀 Construyendo el objeto PyTorch Geometric...")
@@ -104,31 +179,11 @@ def load_graph_to_pyg(driver, features_df: pd.DataFrame, full_df: pd.DataFrame)
     # 2) Y (labels) -> risk_seed como proxy
     y = torch.tensor(full_df["target"].values, dtype=torch.float32).view(-1, 1)
 
-    # 3) Mapeo de IDs (c.id) a índices de fila (0..N-1)
-    id_to_idx = {cid: i for i, cid in enumerate(full_df["id"].tolist())}
-
-    # 4) Extraer aristas y mapear a índices
-    edge_query = """
-    MATCH (c1:Citizen)-[:KNOWS]->(c2:Citizen)
-    RETURN c1.id as source, c2.id as target
-    ORDER BY source, target
-    """
-    with driver.session() as session:
-        result = session.run(edge_query)
-        edges = []
-        for r in result:
-            s_id, t_id = r["source"], r["target"]
-            # Filtrar cualquier id que no esté en el df
-            if s_id in id_to_idx and t_id in id_to_idx:
-                edges.append((id_to_idx[s_id], id_to_idx[t_id]))
-
-    if len(edges) == 0:
-        # Grafo vacío: construir tensor sin aristas
-        edge_index = torch.empty((2, 0), dtype=torch.long)
-    else:
-        edge_index = torch.tensor(edges, dtype=torch.long).t().contiguous()
+    # 3) edge_index (si no se ha extraído ya)
+    if edge_index is None:
+        edge_index = extract_edge_index(driver, full_df["id"].to_numpy())
 
-    data = Data(x=x, edge_index=edge_index, y=y)
+    data = T.ToSparseTensor(remove_edge_index=False)(Data(x=x, edge_index=edge_index, y=y))
     print(
         "✨ Grafo cargado en memoria GPU/CPU:\n"
         f"   - Nodos: {data.num_nodes}\n"
@@ -139,11 +194,12 @@ def load_graph_to_pyg(driver, features_df: pd.DataFrame, full_df: pd.DataFrame)
 
 
 def hydrate_graph_data() -> Data:
-    """Pipeline completo: calcula influencia, extrae features y arma Data (PyG)."""
+    """Pipeline completo: extrae features y aristas, calcula influencia y arma Data (PyG)."""
     driver = _get_driver_from_env()
     try:
-        calculate_criminal_influence(driver)
         df_full, df_feats = extract_features_to_pandas(driver)
-        return load_graph_to_pyg(driver, df_feats, df_full)
+        edge_index = extract_edge_index(driver, df_full["id"].to_numpy())
+        calculate_criminal_influence(driver, df_full, df_feats, edge_index)
+        return load_graph_to_pyg(driver, df_feats, df_full, edge_index)
     finally:
         driver.close()
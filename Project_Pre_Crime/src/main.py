@@ -17,7 +17,7 @@ from torch_geometric.data import Data
 from models import CrimeGenerator, PoliceDiscriminator
 from train import train_precrime_gan
 from connector import Neo4jConnector
-from utils import setup_logging, load_config, create_dummy_graph, load_real_graph_data
+from utils import setup_logging, load_config, create_dummy_graph, load_real_graph_data, export_pipeline
 
 # Cargar variables de entorno
 load_dotenv()
@@ -81,7 +81,8 @@ def main():
         epochs=config['epochs'],
         device=device,
         lr_g=config['learning_rate_g'],
-        lr_d=config['learning_rate_d']
+        lr_d=config['learning_rate_d'],
+        cuda_graph=config['cuda_graph_training']
     )
     logger.info("✓ Modelo entrenado exitosamente")
     
@@ -92,14 +93,18 @@ def main():
     
     torch.save(generator.state_dict(), models_dir / 'generator.pth')
     torch.save(discriminator.state_dict(), models_dir / 'discriminator.pth')
+    # Programa AOT para evaluate.py: carga sin instanciar ni trazar los modelos
+    export_pipeline(generator, discriminator, data, models_dir / 'precrime.pt2')
     logger.info(f"✓ Modelos guardados en {models_dir}")
     
     # 5. HACER PREDICCIONES
     logger.info("\n[PASO 4] Generando predicciones...")
-    with torch.no_grad():
-        predictions = generator(data.x, data.edge_index)
-    
-    risk_scores = discriminator(predictions, data.edge_index)
+    # Modo evaluación (sin dropout) e inference_mode: sin metadatos de autograd
+    generator.eval()
+    discriminator.eval()
+    with torch.inference_mode():
+        predictions = generator(data.x, data.adj_t)
+        risk_scores = torch.sigmoid(discriminator(predictions, data.edge_index))
     logger.info(f"✓ Predicciones generadas. Riesgo promedio: {risk_scores.mean():.4f}")
     
     # 6. EXPORTAR A NEO4J (opcional)
@@ -111,14 +116,12 @@ def main():
                 config['neo4j_user'],
                 config['neo4j_password']
             )
-            # Preparar predicciones para exportar
-            predictions_list = []
-            for i in range(min(10, len(risk_scores))):
-                predictions_list.append({
-                    'source': i,
-                    'target': (i + 1) % data.num_nodes,
-                    'risk': float(risk_scores[i])
-                })
+            # Preparar predicciones para exportar (una sola copia al host)
+            top_risks = risk_scores[:10].view(-1).cpu().tolist()
+            predictions_list = [
+                {'source': i, 'target': (i + 1) % data.num_nodes, 'risk': risk}
+                for i, risk in enumerate(top_risks)
+            ]
             
             db.update_predictions(predictions_list)
             db.close()
@@ -134,6 +137,10 @@ def main():
 
 
 if __name__ == "__main__":
+    # Segmentos expandibles del caching allocator (antes de la primera
+    # asignación CUDA); se respeta el valor si ya viene del entorno o del .env
+    os.environ.setdefault('PYTORCH_CUDA_ALLOC_CONF', 'expandable_segments:True')
+
     # Configurar logging
     setup_logging()
     
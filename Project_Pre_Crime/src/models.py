@@ -16,7 +16,8 @@ class CrimeGenerator(torch.nn.Module):
 
     def forward(self, x, edge_index):
         # x: Características del nodo (historial, riesgo base)
-        # edge_index: Conexiones actuales
+        # edge_index: Conexiones actuales (edge_index o adj_t CSR: SAGEConv
+        # agrega con un spmm fusionado si recibe la adyacencia dispersa)
         x = self.conv1(x, edge_index)
         x = F.relu(x)
         x = F.dropout(x, p=0.2, training=self.training)
@@ -42,4 +43,21 @@ class PoliceDiscriminator(torch.nn.Module):
         x = F.elu(x)
         x = F.dropout(x, p=0.3, training=self.training)
         x = self.conv2(x, edge_index)
-        return torch.sigmoid(x) # Probabilidad: 0 (Ruido) a 1 (Crimen/Riesgo Real)
+        # Logits: la sigmoide se aplica en la pérdida (BCE con logits) o al
+        # consumir el riesgo -> probabilidad 0 (Ruido) a 1 (Crimen/Riesgo Real)
+        return x
+
+class PreCrimePipeline(torch.nn.Module):
+    """
+    INFERENCIA COMPLETA (Criminal + Precogs):
+    Encadena generador y discriminador y devuelve el riesgo (0 a 1) por nodo.
+    Es el módulo que se exporta con torch.export junto a los .pth.
+    """
+    def __init__(self, generator, discriminator):
+        super(PreCrimePipeline, self).__init__()
+        self.generator = generator
+        self.discriminator = discriminator
+
+    def forward(self, x, edge_index):
+        embeddings = self.generator(x, edge_index)
+        return torch.sigmoid(self.discriminator(embeddings, edge_index))
@@ -1,18 +1,56 @@
 import os
+import logging
 import torch
 import torch.nn.functional as F
+import torch_geometric.typing
+from torch_geometric import EdgeIndex
+from torch_geometric.utils import add_self_loops, remove_self_loops
 from models import CrimeGenerator, PoliceDiscriminator
 from dotenv import load_dotenv
 from feature_engineering import hydrate_graph_data
+from utils import compile_models, with_adj_t
 # from connector import Neo4jConnector # Uncomment when using real DB
 
-def train_precrime_gan(data, epochs=50, device=None, lr_g=0.01, lr_d=0.01):
+logger = logging.getLogger(__name__)
+
+# Épocas en eager (en un stream auxiliar) antes de capturar el CUDA graph:
+# materializan el estado de Adam y los buffers del allocator
+CUDA_GRAPH_WARMUP_EPOCHS = 3
+
+
+def _gat_layers(discriminator):
+    return [m for m in discriminator.modules() if hasattr(m, "add_self_loops")]
+
+
+def _capture_cuda_graph(train_step):
+    """
+    Captura una época completa (pasos D y G, backward y Adam) en un CUDA graph.
+    Devuelve (graph, pérdidas estáticas) o (None, None) si la captura falla.
+    """
+    graph = torch.cuda.CUDAGraph()
+    try:
+        with torch.cuda.graph(graph):
+            static_losses = train_step()
+    except Exception as e:
+        logger.warning(f"No se pudo capturar el CUDA graph, se sigue en eager: {e}")
+        return None, None
+    return graph, static_losses
+
+
+def train_precrime_gan(data, epochs=50, device=None, lr_g=0.01, lr_d=0.01, cuda_graph=False):
+    """
+    Entrena el par generador/discriminador.
+
+    cuda_graph activa (solo en CUDA) la captura de cada época en un CUDA
+    graph. Es experimental: aún no se ha comparado en GPU con el camino eager
+    (pérdidas iguales) junto a inductor, adj_t CSR, bf16 y Adam fusionado.
+    """
     # Configuración del dispositivo si no se proporciona
     if device is None:
         device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     
-    # Mover datos al dispositivo
-    data = data.to(device)
+    # Mover datos al dispositivo (con la adyacencia CSR para el generador)
+    data = with_adj_t(data).to(device)
     
     # Inicialización
     in_dim = data.num_features
@@ -22,27 +60,70 @@ def train_precrime_gan(data, epochs=50, device=None, lr_g=0.01, lr_d=0.01):
     generator = CrimeGenerator(in_dim, hidden_dim, out_dim).to(device)
     discriminator = PoliceDiscriminator(out_dim, hidden_dim, 1).to(device) # Salida 1 (Probabilidad)
 
-    # Optimizadores separados
-    optimizer_G = torch.optim.Adam(generator.parameters(), lr=lr_g)
-    optimizer_D = torch.optim.Adam(discriminator.parameters(), lr=lr_d)
+    # Opcional (cuda_graph): el grafo es de forma fija y cada época se
+    # reproduce como un CUDA graph (sin coste de lanzamiento por kernel).
+    # Adam debe ser capturable
+    use_cuda_graph = cuda_graph and device.type == 'cuda'
 
-    # Simulación del Bucle
-    for epoch in range(epochs):
+    # Optimizadores separados. En CUDA, Adam fusionado: un único kernel actualiza
+    # todos los parámetros (muchos tensores pequeños en SAGE/GAT)
+    use_fused = device.type == 'cuda'
+    optimizer_G = torch.optim.Adam(generator.parameters(), lr=lr_g,
+                                   fused=use_fused, capturable=use_cuda_graph)
+    optimizer_D = torch.optim.Adam(discriminator.parameters(), lr=lr_d,
+                                   fused=use_fused, capturable=use_cuda_graph)
+
+    # Self-loops de los GATConv precalculados una vez: su remove/add_self_loops
+    # interno filtra con máscaras booleanas (tamaño dependiente de los datos),
+    # lo que no se puede capturar. El cálculo es el mismo
+    gat_layers = _gat_layers(discriminator)
+    d_edge_index, _ = add_self_loops(remove_self_loops(data.edge_index)[0], num_nodes=data.num_nodes)
+    for layer in gat_layers:
+        layer.add_self_loops = False
+
+    # Con pyg-lib, aristas ordenadas por destino (CSC): GATConv recibe el ptr y
+    # su softmax por vecindario usa el kernel fusionado softmax_csr en lugar de
+    # scatter max + exp + scatter sum. Sin pyg-lib ese camino es más lento
+    if torch_geometric.typing.WITH_SOFTMAX and device.type == 'cpu':
+        d_edge_index = EdgeIndex(d_edge_index, sparse_size=(data.num_nodes, data.num_nodes))
+        d_edge_index = d_edge_index.sort_by('col')[0]
+
+    # Kernels fusionados por inductor. Aquí el modo es 'default': con
+    # cuda_graph la época entera se captura en un CUDA graph propio y
+    # reduce-overhead intentaría anidar los suyos dentro de la captura
+    compile_models(generator, discriminator, device=device, mode="default")
+
+    # bf16 en CUDA (Ampere+): el message passing está limitado por memoria y
+    # mueve la mitad de bytes. Pesos y estado de Adam siguen en fp32, así que
+    # no hace falta GradScaler. Sin caché de autocast: no es compatible con la
+    # captura del CUDA graph
+    use_bf16 = device.type == 'cuda' and torch.cuda.is_bf16_supported()
+    if device.type == 'cuda':
+        torch.set_float32_matmul_precision('high')
+
+    def autocast():
+        return torch.autocast(device_type=device.type, dtype=torch.bfloat16,
+                              enabled=use_bf16, cache_enabled=False)
+
+    def train_step():
         # ---------------------
         # 1. Entrenar a la Policía (Discriminador)
         # ---------------------
         optimizer_D.zero_grad()
         
-        # Generar "crímenes potenciales" (embeddings)
-        fake_node_embeddings = generator(data.x, data.edge_index)
-        
-        # El discriminador evalúa los datos reales vs los generados
-        # (Nota: En una implementación real, aquí decodificaríamos los enlaces)
-        real_pred = discriminator(data.x, data.edge_index) 
-        fake_pred = discriminator(fake_node_embeddings.detach(), data.edge_index)
-        
-        # Loss: Maximizar acierto en reales y acierto en detectar falsos
-        loss_D = -torch.mean(torch.log(real_pred + 1e-9) + torch.log(1 - fake_pred + 1e-9))
+        with autocast():
+            # Generar "crímenes potenciales" (embeddings)
+            fake_node_embeddings = generator(data.x, data.adj_t)
+
+            # El discriminador evalúa los datos reales vs los generados
+            # (Nota: En una implementación real, aquí decodificaríamos los enlaces)
+            real_pred = discriminator(data.x, d_edge_index)
+            fake_pred = discriminator(fake_node_embeddings.detach(), d_edge_index)
+
+            # Loss: Maximizar acierto en reales y acierto en detectar falsos
+            # (sigmoide + log fusionados y numéricamente estables)
+            loss_D = (F.binary_cross_entropy_with_logits(real_pred, torch.ones_like(real_pred))
+                      + F.binary_cross_entropy_with_logits(fake_pred, torch.zeros_like(fake_pred)))
         loss_D.backward()
         optimizer_D.step()
 
@@ -51,16 +132,44 @@ def train_precrime_gan(data, epochs=50, device=None, lr_g=0.01, lr_d=0.01):
         # ---------------------
         optimizer_G.zero_grad()
         
-        # El generador quiere que el discriminador se equivoque (diga que es real)
-        fake_node_embeddings = generator(data.x, data.edge_index)
-        fake_pred = discriminator(fake_node_embeddings, data.edge_index)
-        
-        loss_G = -torch.mean(torch.log(fake_pred + 1e-9))
+        # El generador quiere que el discriminador se equivoque (diga que es real).
+        # Se reutilizan los embeddings del paso D (su grafo sigue vivo: D solo
+        # vio la copia detach); solo el discriminador, ya actualizado, se recalcula
+        with autocast():
+            fake_pred = discriminator(fake_node_embeddings, d_edge_index)
+            loss_G = F.binary_cross_entropy_with_logits(fake_pred, torch.ones_like(fake_pred))
         loss_G.backward()
         optimizer_G.step()
+        return loss_D, loss_G
+
+    graph = static_losses = None
+    if use_cuda_graph:
+        warmup_stream = torch.cuda.Stream()
+        warmup_stream.wait_stream(torch.cuda.current_stream())
+
+    # Simulación del Bucle
+    try:
+        for epoch in range(epochs):
+            if use_cuda_graph and graph is None and epoch >= CUDA_GRAPH_WARMUP_EPOCHS:
+                graph, static_losses = _capture_cuda_graph(train_step)
+                use_cuda_graph = graph is not None
+
+            if graph is not None:
+                graph.replay()
+                loss_D, loss_G = static_losses
+            elif use_cuda_graph:
+                with torch.cuda.stream(warmup_stream):
+                    loss_D, loss_G = train_step()
+                torch.cuda.current_stream().wait_stream(warmup_stream)
+            else:
+                loss_D, loss_G = train_step()
 
-        if epoch % 10 == 0:
-            print(f"Epoch {epoch} | Loss Policía: {loss_D.item():.4f} | Loss Criminal: {loss_G.item():.4f}")
+            if epoch % 10 == 0:
+                print(f"Epoch {epoch} | Loss Policía: {loss_D.item():.4f} | Loss Criminal: {loss_G.item():.4f}")
+    finally:
+        # Fuera del entrenamiento el discriminador vuelve a añadir sus self-loops
+        for layer in gat_layers:
+            layer.add_self_loops = True
 
     return generator, discriminator
 
@@ -68,7 +177,12 @@ def train_precrime_gan(data, epochs=50, device=None, lr_g=0.01, lr_d=0.01):
 if __name__ == "__main__":
     # Preparar entorno y flags
     load_dotenv()
+    # Segmentos expandibles del caching allocator (antes de la primera
+    # asignación CUDA): las épocas de calentamiento previas a la captura del
+    # CUDA graph reutilizan sus bloques sin fragmentar la memoria
+    os.environ.setdefault('PYTORCH_CUDA_ALLOC_CONF', 'expandable_segments:True')
     use_real = os.getenv("USE_REAL_DATA", "true").lower() == "true"
+    cuda_graph = os.getenv("CUDA_GRAPH_TRAINING", "false").lower() == "true"
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 
     if use_real:
@@ -84,7 +198,7 @@ if __name__ == "__main__":
         edge_index = torch.randint(0, 100, (2, 300))
         data = Data(x=x, edge_index=edge_index)
 
-    gen, disc = train_precrime_gan(data, device=device)
+    gen, disc = train_precrime_gan(data, device=device, cuda_graph=cuda_graph)
     
     # 2. Simular exportación a Neo4j (requiere base de datos activa)
     # db = Neo4jConnector("bolt://localhost:7687", "neo4j", "password")
@@ -4,11 +4,16 @@ Utilidades para el sistema Pre-Crime
 Funciones auxiliares para configuración, logging y procesamiento de datos.
 """
 
+import copy
 import logging
 import os
 from pathlib import Path
 import torch
+import torch_geometric.transforms as T
 from torch_geometric.data import Data
+from torch_geometric.data.data import DataEdgeAttr, DataTensorAttr
+from torch_geometric.data.storage import GlobalStorage
+from torch_geometric.utils import sort_edge_index
 
 
 def setup_logging():
@@ -24,6 +29,104 @@ def setup_logging():
     )
 
 
+def compile_models(*models, device, mode="reduce-overhead"):
+    """
+    Compilar in-place el forward de los modelos con torch.compile (inductor)
+
+    Args:
+        models: Módulos a compilar
+        device: Dispositivo (cpu/cuda); en CPU no se compila
+        mode: Modo de torch.compile ('reduce-overhead' instala CUDA graphs)
+
+    Returns:
+        tuple: Los mismos módulos (se sustituye su forward, así el
+        state_dict conserva sus claves y los .pth siguen siendo compatibles)
+    """
+    if torch.device(device).type != 'cuda' or not hasattr(torch, 'compile'):
+        return models
+
+    import torch._dynamo as dynamo
+    import torch._inductor.config as inductor_config
+
+    # Caché en disco de los grafos FX compilados: las siguientes ejecuciones
+    # (p. ej. evaluate.py) reutilizan los kernels en lugar de volver a trazar
+    os.environ.setdefault(
+        'TORCHINDUCTOR_CACHE_DIR',
+        str(Path(os.getenv('MODEL_PATH', './models')).resolve() / 'inductor_cache')
+    )
+    inductor_config.fx_graph_cache = True
+
+    # Un grafo por modo train/eval y por variante de edge_index
+    dynamo.config.cache_size_limit = 64
+
+    for model in models:
+        _compile_forward(model, backend="inductor", mode=mode, fullgraph=False)
+    return models
+
+
+def _compile_forward(model, **options):
+    """
+    Sustituye model.forward por su versión compilada. Si la compilación
+    falla (se traza en la llamada) se registra y el modelo vuelve a eager,
+    sin afectar a otro código compilado del proceso.
+    """
+    eager_forward = model.forward
+    compiled_forward = torch.compile(eager_forward, **options)
+
+    def forward(*args, **kwargs):
+        try:
+            return compiled_forward(*args, **kwargs)
+        except Exception as e:
+            logging.warning(f"⚠ torch.compile falló en {type(model).__name__}, se sigue en eager: {e}")
+            model.forward = eager_forward
+            return eager_forward(*args, **kwargs)
+
+    model.forward = forward
+
+
+def eager_copy(model):
+    """Copia del modelo con su forward original (sin compile_models)."""
+    clone = copy.deepcopy(model)
+    # El forward compilado es un atributo de instancia que apunta al original
+    vars(clone).pop('forward', None)
+    return clone
+
+
+def export_pipeline(generator, discriminator, data, path):
+    """
+    Exportar generador + discriminador (AOT) con torch.export
+
+    Args:
+        generator: CrimeGenerator entrenado
+        discriminator: PoliceDiscriminator entrenado
+        data: Grafo de ejemplo (x, edge_index) para trazar
+        path: Ruta del programa exportado (.pt2)
+
+    Returns:
+        bool: True si se exportó; si falla se registra, se borra un .pt2
+        anterior (ya no corresponde a los .pth) y se sigue con los .pth
+    """
+    from torch.export import Dim
+    from models import PreCrimePipeline
+
+    # Los modelos pueden venir de compile_models: se exportan copias eager
+    # sin arrastrar los grafos de dynamo/CUDA graphs del entrenamiento
+    torch.compiler.reset()
+    pipeline = PreCrimePipeline(eager_copy(generator), eager_copy(discriminator)).eval()
+    # Nº de nodos y de aristas dinámicos: sirve para cualquier grafo
+    dynamic_shapes = {'x': {0: Dim.AUTO}, 'edge_index': {1: Dim.AUTO}}
+    try:
+        program = torch.export.export(pipeline, (data.x, data.edge_index), dynamic_shapes=dynamic_shapes)
+        torch.export.save(program, path)
+    except Exception as e:
+        logging.warning(f"⚠ No se pudo exportar el modelo con torch.export: {e}")
+        Path(path).unlink(missing_ok=True)
+        return False
+
+    logging.info(f"Programa exportado guardado en {path}")
+    return True
+
+
 def load_config():
     """Cargar configuración desde variables de entorno"""
     config = {
@@ -48,6 +151,8 @@ def load_config():
         'batch_size': int(os.getenv('BATCH_SIZE', '32')),
         'learning_rate_g': float(os.getenv('LEARNING_RATE_G', '0.001')),
         'learning_rate_d': float(os.getenv('LEARNING_RATE_D', '0.001')),
+        # Captura de cada época en un CUDA graph (experimental, desactivada)
+        'cuda_graph_training': os.getenv('CUDA_GRAPH_TRAINING', 'false').lower() == 'true',
         
         # Datos
         'use_real_data': os.getenv('USE_REAL_DATA', 'false').lower() == 'true',
@@ -63,6 +168,68 @@ def load_config():
     return config
 
 
+def with_adj_t(data):
+    """
+    Añadir data.adj_t: adyacencia transpuesta en CSR (torch.sparse_csr)
+
+    SAGEConv la agrega con un único spmm en lugar de gather + scatter por
+    arista. Se conserva edge_index (GATConv calcula atención por arista).
+    """
+    if 'adj_t' not in data:
+        data = T.ToSparseTensor(remove_edge_index=False)(data)
+    return data
+
+
+def to_device(data, device):
+    """
+    Mover un Data al dispositivo; en CUDA, desde memoria pinned y con copias
+    H2D asíncronas (non_blocking) que se solapan con el cómputo en curso
+    """
+    if torch.device(device).type == 'cuda':
+        return data.apply(lambda t: t.pin_memory()).to(device, non_blocking=True)
+    return data.to(device)
+
+
+def _gnp_edge_index(num_nodes, num_edges):
+    """
+    Grafo aleatorio no dirigido G(n, p) con ~num_edges pares, sin duplicados
+    ni self-loops (muestreo por saltos geométricos, Batagelj-Brandes)
+
+    Los pares i < j se numeran en orden de fila (k = 0..M-1); los saltos
+    geométricos dan claves estrictamente crecientes, así que no hay que
+    deduplicar. Coste O(N + E) en lugar de generar y coalescer duplicados.
+    """
+    num_pairs = num_nodes * (num_nodes - 1) // 2
+    if num_pairs == 0 or num_edges <= 0:
+        return torch.empty((2, 0), dtype=torch.long)
+
+    if num_edges >= num_pairs:
+        # Grafo completo
+        keys = torch.arange(num_pairs, dtype=torch.long)
+    else:
+        # Saltos hasta superar M (casi siempre basta con la primera tanda)
+        p = num_edges / num_pairs
+        chunks, last = [], -1
+        batch = int(num_edges + 5 * num_edges ** 0.5) + 16
+        while last < num_pairs:
+            gaps = torch.empty(batch, dtype=torch.float64).geometric_(p).long()
+            chunk = last + torch.cumsum(gaps, 0)
+            chunks.append(chunk)
+            last = int(chunk[-1])
+        keys = torch.cat(chunks)
+        keys = keys[keys < num_pairs]
+
+    # Clave -> (i, j): offsets[i] = nº de pares de las filas anteriores
+    rows = torch.arange(num_nodes, dtype=torch.long)
+    offsets = rows * (2 * num_nodes - rows - 1) // 2
+    i = torch.searchsorted(offsets, keys, right=True) - 1
+    j = keys - offsets[i] + i + 1
+
+    # Ambas direcciones, ordenadas por fila (coalescido: ya no hay duplicados)
+    edge_index = torch.stack([torch.cat([i, j]), torch.cat([j, i])])
+    return sort_edge_index(edge_index, num_nodes=num_nodes)
+
+
 def create_dummy_graph(num_nodes, num_edges, num_features, device):
     """
     Crear un grafo dummy para pruebas
@@ -76,13 +243,16 @@ def create_dummy_graph(num_nodes, num_edges, num_features, device):
     Returns:
         torch_geometric.data.Data: Grafo
     """
+    # Se construye en CPU y se transfiere una sola vez al final (el mismo grafo
+    # para una semilla dada, sea cual sea el dispositivo)
     # Características: vector aleatorio para cada nodo
-    x = torch.randn((num_nodes, num_features), device=device)
+    x = torch.randn((num_nodes, num_features))
     
-    # Aristas: conexiones aleatorias
-    edge_index = torch.randint(0, num_nodes, (2, num_edges), device=device)
+    # Aristas: grafo aleatorio sin self-loops, no dirigido y coalescido
+    # (ordenado y sin duplicados: los scatter del message passing acceden en orden)
+    edge_index = _gnp_edge_index(num_nodes, num_edges)
     
-    return Data(x=x, edge_index=edge_index)
+    return to_device(with_adj_t(Data(x=x, edge_index=edge_index)), device)
 
 
 def create_real_graph_from_neo4j(db_uri, db_user, db_password, device):
@@ -122,8 +292,12 @@ def load_real_graph_data(device='cpu', data_path='data/precrime_graph.pt'):
             "Ejecuta primero: python src/data_hydrator.py"
         )
     
-    data = torch.load(data_file)
-    data = data.to(device)
+    # mmap: los tensores se leen bajo demanda desde el fichero en lugar de
+    # materializar una copia completa en RAM antes de moverlos al dispositivo.
+    # weights_only (por defecto desde torch 2.6) necesita las clases de Data
+    with torch.serialization.safe_globals([Data, DataEdgeAttr, DataTensorAttr, GlobalStorage]):
+        data = torch.load(data_file, map_location='cpu', mmap=True)
+    data = to_device(with_adj_t(data), device)
     
     logging.info(f"Datos reales cargados desde {data_path}")
     return data